@@ -0,0 +1,226 @@
+"""Synthetic 10-K style PDF corpus for benchmarks
+
+Generates seeded, reproducible filings so benchmark numbers do not depend
+on a PDF we cannot commit (data/raw/ is not in the repo). No PDF library
+is needed: the writer below emits plain PDF 1.4 with one Helvetica font.
+"""
+import random
+import textwrap
+from pathlib import Path
+from typing import List, Dict, Union
+
+LINES_PER_PAGE = 55
+LINE_WIDTH = 95
+
+COMPANIES = [
+    "Northwind Motors", "Contoso Energy", "Fabrikam Mobility", "Tailspin Power",
+    "Litware Automotive", "Adatum Grid", "Proseware Robotics", "Wingtip Systems",
+]
+
+FILLER = [
+    "The following discussion should be read together with the consolidated financial statements and related notes.",
+    "Forward-looking statements involve risks and uncertainties and actual results may differ materially.",
+    "We continue to invest in manufacturing capacity, research and development and our service network.",
+    "Management evaluated the effectiveness of internal control over financial reporting as of December 31, 2023.",
+    "Changes in foreign currency exchange rates affected reported revenues and costs during the period.",
+    "Our business depends on the continued availability of raw materials such as lithium, nickel and cobalt.",
+    "Operating expenses increased primarily due to higher employee compensation and depreciation.",
+    "We lease certain facilities and equipment under operating leases with remaining terms of up to 20 years.",
+]
+
+# Discussion sentences are assembled from these, so chunks hold many distinct
+# sentences like a real filing does (not a handful repeated throughout)
+TOPICS = [
+    "Automotive revenue", "Service and other revenue", "Energy generation revenue", "Gross margin",
+    "Operating expenses", "Research and development expense", "Selling, general and administrative expense",
+    "Capital expenditures", "Warranty reserves", "Inventory", "Free cash flow", "Regulatory credit sales",
+    "Interest income", "Stock-based compensation", "Depreciation and amortization", "Average selling price",
+]
+CHANGES = ["increased", "decreased", "grew", "declined", "was broadly unchanged, moving"]
+PERIODS = [
+    "in the fourth quarter", "during the second half of the year", "compared to the prior year",
+    "in fiscal 2023", "over the last three fiscal years", "on a constant currency basis",
+]
+CAUSES = [
+    "higher vehicle deliveries", "lower average selling prices", "the ramp of new production lines",
+    "raw material cost inflation", "a shift in product mix", "foreign currency movements",
+    "new product introductions", "higher interest rates on cash balances", "supply chain constraints",
+    "growth of the service and charging network", "price reductions in several markets",
+    "lower freight and logistics costs", "increased headcount in engineering", "higher battery cell costs",
+]
+
+RISKS = [
+    "We may be unable to meet our production timelines, which could harm our business and prospects.",
+    "Supply chain disruptions could increase costs and delay deliveries to customers.",
+    "Our products rely on software and hardware that are highly technical and may contain defects.",
+    "We face strong competition and may not be able to compete successfully.",
+    "Changes in government incentives for electric vehicles and storage could reduce demand.",
+    "We are highly dependent on the services of key executives and engineering talent.",
+]
+
+SITES = ["Fremont, California", "Austin, Texas", "Reno, Nevada", "Berlin, Germany", "Shanghai, China", "Buffalo, New York"]
+
+
+def _discussion(rng: random.Random) -> str:
+    """One management's-discussion style sentence, or now and then a boilerplate one"""
+    if rng.random() < 0.2:
+        return rng.choice(FILLER)
+    return (
+        f"{rng.choice(TOPICS)} {rng.choice(CHANGES)} {rng.randint(1, 40)}% {rng.choice(PERIODS)}, "
+        f"primarily due to {rng.choice(CAUSES)} and {rng.choice(CAUSES)}."
+    )
+
+
+def _facts(rng: random.Random) -> Dict[str, str]:
+    revenue = rng.randint(20_000, 120_000)
+    return {
+        "revenue": f"{revenue:,}",
+        "revenue_growth": f"{rng.randint(3, 45)}",
+        "deliveries": f"{rng.randint(200_000, 2_000_000):,}",
+        "storage": f"{rng.randint(200, 2_000) / 100:.2f}",
+        "net_income": f"{rng.randint(revenue // 20, revenue // 6):,}",
+        "gross_profit": f"{rng.randint(revenue // 8, revenue // 4):,}",
+    }
+
+
+def _statement_of_operations(facts: Dict[str, str]) -> List[str]:
+    """Income statement table, one PDF line per row, as filings lay them out"""
+    growth = 1 + int(facts["revenue_growth"]) / 100
+    revenue = int(facts["revenue"].replace(",", ""))
+    net_income = int(facts["net_income"].replace(",", ""))
+    years = [revenue, round(revenue / growth), round(revenue / growth / 1.2)]
+
+    def row(label: str, values: List[int]) -> str:
+        return f"{label} " + " ".join(f"{v:,}" for v in values)
+
+    cost = [round(v * 0.78) for v in years]
+    opex = [round(v * 0.09) for v in years]
+    income = [net_income] + [round(net_income * v / revenue) for v in years[1:]]
+    return [
+        "Consolidated Statements of Operations",
+        "(in millions)",
+        "Year Ended December 31, 2023 2022 2021",
+        "Revenues",
+        row("Automotive sales", [round(v * 0.82) for v in years]),
+        row("Energy generation and storage", [round(v * 0.08) for v in years]),
+        row("Services and other", [v - round(v * 0.82) - round(v * 0.08) for v in years]),
+        row("Total revenues", years),
+        row("Total cost of revenues", cost),
+        row("Gross profit", [v - c for v, c in zip(years, cost)]),
+        row("Total operating expenses", opex),
+        row("Net income", income),
+    ]
+
+
+def _paragraphs(company: str, facts: Dict[str, str], rng: random.Random, pages: int) -> List[Union[str, List[str]]]:
+    """Body text for one filing, roughly `pages` pages long"""
+    key = [
+        f"{company} Annual Report on Form 10-K for the fiscal year ended December 31, 2023.",
+        f"Total revenues were ${facts['revenue']} million in 2023, an increase of {facts['revenue_growth']}% compared to 2022.",
+        f"We delivered {facts['deliveries']} vehicles in 2023 across all models.",
+        f"Energy storage deployments were {facts['storage']} GWh in 2023.",
+        f"Net income attributable to common stockholders was ${facts['net_income']} million in 2023.",
+        f"Gross profit for the automotive segment was ${facts['gross_profit']} million in 2023.",
+        "Our manufacturing facilities are located in " + ", ".join(rng.sample(SITES, 4)) + ".",
+        "Risk Factors. " + " ".join(rng.sample(RISKS, 4)),
+        _statement_of_operations(facts),
+    ]
+
+    paragraphs = []
+    target_lines = pages * LINES_PER_PAGE
+    lines = 0
+    while lines < target_lines:
+        paragraph = " ".join(_discussion(rng) for _ in range(rng.randint(3, 6)))
+        # Spread the key facts through the document instead of front-loading them
+        if key and rng.random() < 0.15:
+            if isinstance(key[0], list):
+                paragraphs.append(key.pop(0))
+                lines += len(paragraphs[-1]) + 1
+            else:
+                paragraph = key.pop(0) + " " + paragraph
+        paragraphs.append(paragraph)
+        lines += len(textwrap.wrap(paragraph, LINE_WIDTH)) + 1
+    paragraphs.extend(key)
+    return paragraphs
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: Path, paragraphs: List[Union[str, List[str]]]):
+    """Write text paragraphs (or lists of pre-laid-out lines, e.g. tables) as a minimal multi-page PDF"""
+    lines = []
+    for paragraph in paragraphs:
+        lines.extend(paragraph if isinstance(paragraph, list) else textwrap.wrap(paragraph, LINE_WIDTH))
+        lines.append("")
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+
+    # Object 1: catalog, 2: page tree, 3: font, then (page, content) pairs
+    objects = [b"", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page_lines in pages:
+        stream = "BT /F1 9 Tf 11 TL 40 770 Td\n" + "".join(
+            f"({_escape(line)}) Tj T*\n" for line in page_lines
+        ) + "ET"
+        stream = stream.encode("latin-1", "replace")
+        page_num = len(objects) + 1
+        kids.append(f"{page_num} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_num + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    Path(path).write_bytes(bytes(out))
+
+
+def build_corpus(out_dir: str, docs: int = 4, pages: int = 30, seed: int = 7) -> List[Dict]:
+    """Write `docs` synthetic filings into out_dir; returns [{doc_id, path, company, facts}]"""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+
+    corpus = []
+    for i in range(docs):
+        company = COMPANIES[i % len(COMPANIES)]
+        facts = _facts(rng)
+        doc_id = f"{company.lower().replace(' ', '_')}_10k_2023_{i}"
+        path = out / f"{doc_id}.pdf"
+        write_pdf(path, _paragraphs(company, facts, rng, pages))
+        corpus.append({"doc_id": doc_id, "path": str(path), "company": company, "facts": facts})
+    return corpus
+
+
+def load_corpus(corpus_dir: str) -> List[Dict]:
+    """Use existing PDFs (e.g. data/raw/) instead of generated ones"""
+    return [
+        {"doc_id": path.stem, "path": str(path), "company": path.stem, "facts": {}}
+        for path in sorted(Path(corpus_dir).glob("*.pdf"))
+    ]
+
+
+QUESTIONS = [
+    "How many vehicles delivered in 2023?",
+    "What was total revenue in 2023?",
+    "What were total revenues in 2022?",
+    "How much energy storage was deployed in 2023?",
+    "What is the net income?",
+    "Manufacturing locations and facilities",
+    "Gross profit automotive segment",
+    "What are the main risk factors mentioned?",
+    "How did foreign currency exchange rates affect revenues?",
+]
@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+"""Load generator for the FastAPI service with concurrency / rate sweeps
+
+Drives /api/v1/query and /api/v1/ingest with a mix of requests and records,
+per load level, throughput, error rate and a latency histogram.
+
+Two load models:
+  closed  N workers, each sends its next request when the previous one returns
+          (sweep --concurrency)
+  open    requests arrive on a Poisson schedule whether or not earlier ones
+          finished (sweep --rates); latency is measured from the scheduled
+          arrival so queueing delay is not hidden
+
+Targets:
+  (default)    api.main:app in-process, with the stand-ins from stubs.py
+  --url URL    a running server, e.g. http://localhost:8000
+
+Uploads (--ingest-ratio) write synthetic filings (doc ids loadtest_N) into
+the target's index, where real queries can retrieve them. Against --url
+that needs --allow-writes, and the ids written are listed at the end so
+they can be removed.
+
+In-process, the app and the generator share one event loop, the same way
+requests share a single uvicorn worker, so a handler that blocks the loop
+shows up as queueing delay here too.
+
+Usage:
+    python benchmarks/load_test.py --concurrency 1,2,4,8,16 --duration 10
+    python benchmarks/load_test.py --mode open --rates 5,10,20,40 --ingest-ratio 0.05
+    python benchmarks/load_test.py --url http://localhost:8000 --concurrency 1,4
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+import corpus
+import stubs
+from run_benchmark import SRC_DIR, isolate_llm_cache, percentile, peak_rss_mb
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+
+def histogram(latencies) -> dict:
+    counts = [0] * (len(BUCKETS_MS) + 1)
+    for ms in latencies:
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    labels = [f"<={b}" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"]
+    return dict(zip(labels, counts))
+
+
+def summarize(records, elapsed: float) -> dict:
+    """records: list of (op, latency_ms, ok)"""
+    latencies = [ms for _, ms, _ in records]
+    errors = sum(1 for _, _, ok in records if not ok)
+    summary = {
+        "requests": len(records),
+        "errors": errors,
+        "error_rate": round(errors / len(records), 4) if records else 0.0,
+        "throughput_rps": round(len(records) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(max(latencies), 2) if latencies else 0.0,
+        "histogram": histogram(latencies),
+    }
+    by_op = {}
+    for op in sorted({op for op, _, _ in records}):
+        op_latencies = [ms for o, ms, _ in records if o == op]
+        by_op[op] = {
+            "requests": len(op_latencies),
+            "errors": sum(1 for o, _, ok in records if o == op and not ok),
+            "p50_ms": round(percentile(op_latencies, 50), 2),
+            "p99_ms": round(percentile(op_latencies, 99), 2),
+        }
+    summary["by_op"] = by_op
+    return summary
+
+
+class Workload:
+    """Picks the next request: a query, or (with probability ingest_ratio) an upload"""
+
+    def __init__(self, questions, pdf_bytes: bytes, ingest_ratio: float, seed: int, uploaded: set = None):
+        self.questions = itertools.cycle(questions)
+        self.pdf_bytes = pdf_bytes
+        self.ingest_ratio = ingest_ratio
+        self.rng = random.Random(seed)
+        self.uploads = itertools.count()
+        self.uploaded = uploaded if uploaded is not None else set()
+
+    async def send(self, client: httpx.AsyncClient):
+        """Returns (op, ok)"""
+        if self.ingest_ratio and self.rng.random() < self.ingest_ratio:
+            doc_id = f"loadtest_{next(self.uploads)}"
+            self.uploaded.add(doc_id)
+            response = await client.post(
+                "/api/v1/ingest",
+                params={"doc_id": doc_id},
+                files={"file": (f"{doc_id}.pdf", self.pdf_bytes, "application/pdf")},
+            )
+            return "ingest", response.status_code < 400
+        response = await client.post("/api/v1/query", json={"query": next(self.questions)})
+        return "query", response.status_code < 400
+
+
+async def _timed(workload: Workload, client: httpx.AsyncClient, started: float, records: list):
+    try:
+        op, ok = await workload.send(client)
+    except (httpx.HTTPError, OSError):
+        op, ok = "error", False
+    records.append((op, (time.perf_counter() - started) * 1000, ok))
+
+
+async def run_closed(client, workload: Workload, concurrency: int, duration: float) -> dict:
+    records = []
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            await _timed(workload, client, time.perf_counter(), records)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(records, time.perf_counter() - start)
+
+
+async def run_open(client, workload: Workload, rate: float, duration: float, max_in_flight: int, seed: int) -> dict:
+    records = []
+    rng = random.Random(seed)
+    limit = asyncio.Semaphore(max_in_flight)
+    tasks = []
+
+    async def arrival(scheduled: float):
+        # Latency counts from the scheduled arrival, including time spent
+        # waiting for an in-flight slot (avoids coordinated omission)
+        async with limit:
+            await _timed(workload, client, scheduled, records)
+
+    start = time.perf_counter()
+    next_at = start
+    while next_at < start + duration:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(arrival(next_at)))
+        next_at += rng.expovariate(rate)
+    await asyncio.gather(*tasks)
+
+    summary = summarize(records, time.perf_counter() - start)
+    summary["offered_rps"] = rate
+    return summary
+
+
+@contextlib.contextmanager
+def in_process_app(args):
+    """Import api.main:app with the stand-ins and seed the index with a synthetic corpus"""
+    stubs.install(
+        embed_latency_ms=args.embed_latency_ms,
+        embed_per_text_ms=args.embed_per_text_ms,
+        llm_latency_ms=args.llm_latency_ms,
+        llm_per_1k_tokens_ms=args.llm_per_1k_tokens_ms,
+    )
+    sys.path.insert(0, str(SRC_DIR))
+
+    with isolate_llm_cache():
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+            from api.main import app
+            from pipeline import process_document
+            for doc in corpus.build_corpus(tmp, docs=args.seed_docs, pages=args.pages, seed=args.seed):
+                process_document(doc["path"], doc["doc_id"])
+        yield app
+
+
+def build_client(args, app=None) -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    timeout = httpx.Timeout(args.timeout)
+    if app is not None:
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=timeout)
+    return httpx.AsyncClient(base_url=args.url.rstrip("/"), timeout=timeout, limits=limits)
+
+
+async def sweep(args, app=None, uploaded: set = None) -> list:
+    with tempfile.TemporaryDirectory() as tmp:
+        upload = corpus.build_corpus(tmp, docs=1, pages=args.upload_pages, seed=args.seed + 1)[0]
+        pdf_bytes = Path(upload["path"]).read_bytes()
+
+    levels = args.rates if args.mode == "open" else args.concurrency
+    results = []
+    async with build_client(args, app) as client:
+        for level in levels:
+            workload = Workload(corpus.QUESTIONS, pdf_bytes, args.ingest_ratio, args.seed, uploaded)
+            # Output from the app (agent prints) would swamp the report
+            with contextlib.redirect_stdout(io.StringIO()) if app is not None else contextlib.nullcontext():
+                if args.mode == "open":
+                    summary = await run_open(client, workload, level, args.duration, args.max_in_flight, args.seed)
+                else:
+                    summary = await run_closed(client, workload, int(level), args.duration)
+            summary["level"] = level
+            results.append(summary)
+            print_level(args.mode, summary)
+    return results
+
+
+def print_level(mode: str, s: dict):
+    label = f"rate {s['level']:g}/s" if mode == "open" else f"concurrency {s['level']:g}"
+    print(f"\n{'='*70}")
+    print(f"{label.upper()}")
+    print(f"{'='*70}")
+    print(f"Requests: {s['requests']}  Errors: {s['errors']} ({s['error_rate']:.1%})  Throughput: {s['throughput_rps']:.1f} req/s")
+    print(f"Latency ms: p50 {s['p50_ms']:.1f}  p95 {s['p95_ms']:.1f}  p99 {s['p99_ms']:.1f}  max {s['max_ms']:.1f}")
+    for op, o in s["by_op"].items():
+        print(f"  {op:<7} {o['requests']:>6} req  {o['errors']:>4} err  p50 {o['p50_ms']:.1f}  p99 {o['p99_ms']:.1f}")
+    peak = max(s["histogram"].values()) or 1
+    for bucket, count in s["histogram"].items():
+        if count:
+            print(f"  {bucket:>8} ms {count:>6} {'#' * max(1, round(40 * count / peak))}")
+
+
+def print_summary(mode: str, results: list):
+    print(f"\n\n{'='*70}")
+    print("📊 SWEEP SUMMARY")
+    print(f"{'='*70}")
+    level_name = "Rate/s" if mode == "open" else "Concurrency"
+    print(f"\n{level_name:<12} {'Req/s':>9} {'Errors':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    print("-" * 70)
+    for s in results:
+        print(f"{s['level']:<12g} {s['throughput_rps']:>9.1f} {s['error_rate']:>8.1%} "
+              f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f}")
+    best = max(results, key=lambda s: s["throughput_rps"])
+    print(f"\nPeak throughput {best['throughput_rps']:.1f} req/s at {level_name.lower()} {best['level']:g}")
+
+
+def _floats(value: str):
+    return [float(v) for v in value.split(",") if v]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--url", help="target a running server instead of the in-process app")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--concurrency", type=_floats, default=[1, 2, 4, 8], help="closed loop: comma separated worker counts")
+    parser.add_argument("--rates", type=_floats, default=[5, 10, 20], help="open loop: comma separated arrivals/sec")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="open loop: cap on outstanding requests")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per load level")
+    parser.add_argument("--ingest-ratio", type=float, default=0.0, help="fraction of requests that are uploads")
+    parser.add_argument("--upload-pages", type=int, default=5, help="pages in the uploaded synthetic PDF")
+    parser.add_argument("--allow-writes", action="store_true", help="with --url: allow uploads into the live index")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout (s)")
+    parser.add_argument("--seed", type=int, default=7)
+    # In-process only
+    parser.add_argument("--seed-docs", type=int, default=2, help="synthetic documents indexed before the sweep")
+    parser.add_argument("--pages", type=int, default=30, help="pages per seeded document")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0)
+    parser.add_argument("--embed-per-text-ms", type=float, default=0.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--llm-per-1k-tokens-ms", type=float, default=0.0)
+    parser.add_argument("--output", help="write full results as JSON here")
+    args = parser.parse_args(argv)
+
+    if args.url and args.ingest_ratio and not args.allow_writes:
+        parser.error("--ingest-ratio against --url writes loadtest_N documents into the live index; "
+                     "pass --allow-writes to do that on purpose")
+
+    print("\n🚀 LOAD TEST")
+    print(f"Target: {args.url or 'api.main:app (in-process, stub services)'}  Mode: {args.mode}  "
+          f"Ingest ratio: {args.ingest_ratio:.0%}  {args.duration:g}s per level")
+
+    uploaded = set()
+    if args.url:
+        results = asyncio.run(sweep(args, uploaded=uploaded))
+    else:
+        with in_process_app(args) as app:
+            results = asyncio.run(sweep(args, app))
+
+    print_summary(args.mode, results)
+    if not args.url:
+        print(f"Peak RSS (load generator + app): {peak_rss_mb():.1f} MB")
+    elif uploaded:
+        print(f"\n⚠️  Documents written to {args.url} (remove them from the index): "
+              + ", ".join(sorted(uploaded, key=lambda d: int(d.rsplit("_", 1)[1]))))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"config": vars(args), "levels": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,412 @@
+#!/usr/bin/env python
+"""Offline benchmark: real pipeline + agent graph against local stand-ins
+
+Runs pipeline.process_document and agents.workflow.agent_graph exactly as
+the API does, but with the stand-ins from stubs.py in place of the
+embedding model, Pinecone and Groq, and a synthetic PDF corpus. No network,
+no API keys. Service-call counts are exact on every run and are gated
+tightly; timings (with simulated service latency) are medians over passes.
+
+Usage:
+    python benchmarks/run_benchmark.py                    # compare to baseline.json
+    python benchmarks/run_benchmark.py --update-baseline  # store a new baseline
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import stubs
+import corpus
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+
+# metric -> (higher is better, kind)
+#   count: deterministic service-call counters from the sequential phases; gated by --count-tolerance
+#   time:  medians over --repeat passes with simulated service latency; gated by --tolerance
+#   tail:  p95/p99 of ~100 samples move with scheduler noise; reported, never fail the run
+METRICS = {
+    "ingest_embed_calls_per_doc": (False, "count"),
+    "query_llm_calls_per_query": (False, "count"),
+    "query_prompt_tokens_per_call": (False, "count"),
+    "query_index_calls_per_query": (False, "count"),
+    "query_embed_texts_per_query": (False, "count"),
+    "ingest_chunks_per_sec": (True, "time"),
+    "ingest_peak_alloc_mb": (False, "time"),
+    "query_p50_ms": (False, "time"),
+    "batch_questions_per_sec": (True, "time"),
+    "peak_rss_mb": (False, "time"),
+    "query_p95_ms": (False, "tail"),
+    "query_p99_ms": (False, "tail"),
+}
+
+
+def median(values) -> float:
+    ordered = sorted(values)
+    mid = len(ordered) // 2
+    return ordered[mid] if len(ordered) % 2 else (ordered[mid - 1] + ordered[mid]) / 2
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile (no interpolation, so it is always an observed value)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def peak_rss_mb() -> float:
+    """High-water RSS of this process"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def count_sharded_index_calls():
+    """With --shards the stand-in index runs in the shard processes, out of reach of stubs.stats;
+    count on the ShardedIndex instead, one per query/upsert as an unsharded index would"""
+    from vector_store import get_index
+    index = get_index()
+    query, upsert = index.query, index.upsert
+
+    def counted_query(*args, **kwargs):
+        stubs.stats.add(index_queries=1)
+        return query(*args, **kwargs)
+
+    def counted_upsert(*args, **kwargs):
+        stubs.stats.add(index_upserts=1)
+        return upsert(*args, **kwargs)
+
+    index.query, index.upsert = counted_query, counted_upsert
+
+
+def isolate_llm_cache() -> tempfile.TemporaryDirectory:
+    """Point llm_client at an empty completion cache (keep the returned dir alive)"""
+    cache_dir = tempfile.TemporaryDirectory()
+    os.environ["LLM_CACHE_PATH"] = str(Path(cache_dir.name) / "llm_cache.sqlite")
+    return cache_dir
+
+
+def new_state(query: str) -> dict:
+    from agents.state import AgentState
+    return AgentState(
+        query=query,
+        retrieved_chunks=[],
+        retrieval_score=0.0,
+        figures=[],
+        context="",
+        context_tokens=0,
+        tokens_saved=0,
+        answer="",
+        answer_confidence=0.0,
+        has_hallucination=False,
+        verification_notes="",
+        step_count=0,
+        error=""
+    )
+
+
+def quiet(verbose: bool):
+    """The pipeline prints progress per chunk; keep that out of the timings"""
+    return contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+
+def bench_ingest(documents, repeat: int = 1, verbose: bool = False) -> dict:
+    """Ingest the corpus `repeat` times (ids are stable, so later passes overwrite); report the median pass"""
+    from pipeline import process_document
+    from vector_store import get_index
+
+    index = get_index()
+    before = index.describe_index_stats()["total_vector_count"]
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for doc in documents:
+            with quiet(verbose):
+                process_document(doc["path"], doc["doc_id"])
+        timings.append(time.perf_counter() - start)
+    elapsed = median(timings)
+
+    chunks = index.describe_index_stats()["total_vector_count"] - before
+    return {
+        "documents": len(documents),
+        "chunks": chunks,
+        "ingest_seconds": round(elapsed, 4),
+        "ingest_chunks_per_sec": round(chunks / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def bench_ingest_memory(doc: dict, verbose: bool = False) -> float:
+    """Peak Python-allocated MB while ingesting one document (traced separately: tracemalloc is slow)"""
+    from pipeline import process_document
+
+    tracemalloc.start()
+    try:
+        with quiet(verbose):
+            process_document(doc["path"], doc["doc_id"])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024 / 1024, 2)
+
+
+def bench_queries(questions, rounds: int, repeat: int = 1, verbose: bool = False) -> dict:
+    """Run the question set `rounds` times per pass; each percentile is the median over passes"""
+    from agents.workflow import agent_graph
+
+    # First invoke pays for graph setup; keep it out of the percentiles
+    with quiet(verbose):
+        agent_graph.invoke(new_state(questions[0]))
+    stubs.stats.reset()
+
+    passes = []
+    fallbacks = 0
+    for _ in range(repeat):
+        latencies = []
+        for _ in range(rounds):
+            for question in questions:
+                start = time.perf_counter()
+                with quiet(verbose):
+                    result = agent_graph.invoke(new_state(question))
+                latencies.append((time.perf_counter() - start) * 1000)
+                if result["answer"].startswith("I couldn't find reliable information"):
+                    fallbacks += 1
+        passes.append(latencies)
+
+    return {
+        "queries": len(passes[0]),
+        "fallbacks": fallbacks // repeat,
+        "query_mean_ms": round(median([sum(p) / len(p) for p in passes]), 3),
+        "query_p50_ms": round(median([percentile(p, 50) for p in passes]), 3),
+        "query_p95_ms": round(median([percentile(p, 95) for p in passes]), 3),
+        "query_p99_ms": round(median([percentile(p, 99) for p in passes]), 3),
+    }
+
+
+def bench_batch(questions, rounds: int, repeat: int = 1, verbose: bool = False) -> dict:
+    """The whole question sheet through agents.batch (what /query/batch runs); median of `repeat` sheets"""
+    from agents.batch import retrieve_batch, answer_batch
+
+    async def run_sheet(sheet):
+        retrieved, _ = retrieve_batch(sheet)
+        return [item async for item in answer_batch(sheet, retrieved)]
+
+    timings = []
+    errors = 0
+    for r in range(repeat):
+        # Numbered so no sheet is answered from the completion cache of an earlier phase
+        sheet = [f"{q} ({r}.{i})" for i in range(rounds) for q in questions]
+        start = time.perf_counter()
+        with quiet(verbose):
+            answered = asyncio.run(run_sheet(sheet))
+        timings.append(time.perf_counter() - start)
+        errors += sum(1 for _, _, error in answered if error)
+    elapsed = median(timings)
+
+    return {
+        "batch_questions": len(sheet),
+        "batch_errors": errors // repeat,
+        "batch_seconds": round(elapsed, 4),
+        "batch_questions_per_sec": round(len(sheet) / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, count_tolerance: float = 0.05) -> list:
+    """Rows of (metric, baseline, current, change, status); status is ok/REGRESSION/slower (advisory)/improved"""
+    rows = []
+    for metric, (higher_is_better, kind) in METRICS.items():
+        old = baseline.get("metrics", {}).get(metric)
+        new = results["metrics"].get(metric)
+        if old is None or new is None or old == 0:
+            rows.append((metric, old, new, None, "new"))
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        limit = count_tolerance if kind == "count" else tolerance
+        if worse > limit:
+            status = "slower (advisory)" if kind == "tail" else "REGRESSION"
+        elif worse < -limit:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((metric, old, new, change, status))
+    return rows
+
+
+def run(args) -> dict:
+    stubs.install(
+        embed_latency_ms=args.embed_latency_ms,
+        embed_per_text_ms=args.embed_per_text_ms,
+        llm_latency_ms=args.llm_latency_ms,
+        llm_per_1k_tokens_ms=args.llm_per_1k_tokens_ms,
+        index_latency_ms=args.index_latency_ms,
+    )
+    sys.path.insert(0, str(SRC_DIR))
+    # Read when vector_store is imported; >1 puts each stand-in shard in its own process
+    os.environ["VECTOR_SHARDS"] = str(args.shards)
+
+    # Every run starts cold; later rounds hit the cache like repeat questions do in production
+    with tempfile.TemporaryDirectory() as tmp, isolate_llm_cache():
+        if args.corpus:
+            documents = corpus.load_corpus(args.corpus)
+            if not documents:
+                raise SystemExit(f"No PDFs found in {args.corpus}")
+        else:
+            documents = corpus.build_corpus(tmp, docs=args.docs, pages=args.pages, seed=args.seed)
+
+        with quiet(args.verbose):
+            import agents.workflow  # noqa: F401  (model + client setup is not part of ingest)
+        if args.shards > 1:
+            count_sharded_index_calls()
+
+        stubs.stats.reset()
+        ingest = bench_ingest(documents, args.repeat, args.verbose)
+        ingest_services = stubs.stats.as_dict()
+        ingest["ingest_peak_alloc_mb"] = bench_ingest_memory(
+            max(documents, key=lambda d: Path(d["path"]).stat().st_size), args.verbose
+        )
+
+        queries = bench_queries(corpus.QUESTIONS, args.rounds, args.repeat, args.verbose)
+        query_services = stubs.stats.as_dict()
+
+        import llm_client
+        query_services["llm_client"] = llm_client.stats()
+
+        batch = bench_batch(corpus.QUESTIONS, args.rounds, args.repeat, args.verbose)
+
+    # Query counters cover all passes; the query phase is sequential, so they are exact
+    asked = queries["queries"] * args.repeat
+    metrics = {
+        "ingest_embed_calls_per_doc": round(ingest_services["embed_calls"] / (len(documents) * args.repeat), 3),
+        "query_llm_calls_per_query": round(query_services["llm_calls"] / asked, 3),
+        "query_prompt_tokens_per_call": round(
+            query_services["llm_prompt_tokens"] / query_services["llm_calls"], 1
+        ) if query_services["llm_calls"] else 0.0,
+        "query_index_calls_per_query": round(query_services["index_queries"] / asked, 3),
+        "query_embed_texts_per_query": round(query_services["embed_texts"] / asked, 3),
+        "ingest_chunks_per_sec": ingest["ingest_chunks_per_sec"],
+        "ingest_peak_alloc_mb": ingest["ingest_peak_alloc_mb"],
+        "query_p50_ms": queries["query_p50_ms"],
+        "query_p95_ms": queries["query_p95_ms"],
+        "query_p99_ms": queries["query_p99_ms"],
+        "batch_questions_per_sec": batch["batch_questions_per_sec"],
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    return {
+        "config": {
+            "docs": len(documents),
+            "pages": None if args.corpus else args.pages,
+            "corpus": args.corpus,
+            "rounds": args.rounds,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "shards": args.shards,
+            "embed_latency_ms": args.embed_latency_ms,
+            "embed_per_text_ms": args.embed_per_text_ms,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_per_1k_tokens_ms": args.llm_per_1k_tokens_ms,
+            "index_latency_ms": args.index_latency_ms,
+        },
+        "machine": {"python": platform.python_version(), "platform": platform.platform()},
+        "metrics": metrics,
+        "ingest": ingest,
+        "queries": queries,
+        "batch": batch,
+        "services": {"ingest": ingest_services, "query": query_services},
+    }
+
+
+def print_report(results: dict, rows: list):
+    print(f"\n{'='*70}")
+    print("BENCHMARK RESULTS")
+    print(f"{'='*70}")
+    ingest, queries = results["ingest"], results["queries"]
+    print(f"Ingest: {ingest['documents']} docs, {ingest['chunks']} chunks in {ingest['ingest_seconds']:.2f}s, "
+          f"{ingest['ingest_peak_alloc_mb']:.2f}MB peak allocated per document")
+    print(f"Queries: {queries['queries']} ({queries['fallbacks']} fell back), mean {queries['query_mean_ms']:.2f} ms")
+    batch = results["batch"]
+    print(f"Batch: {batch['batch_questions']} questions in {batch['batch_seconds']:.2f}s ({batch['batch_errors']} errors)")
+    llm = results["services"]["query"]
+    if llm["llm_calls"]:
+        print(f"LLM: {llm['llm_calls']} calls, {llm['llm_prompt_tokens'] / llm['llm_calls']:.0f} prompt tokens/call")
+    client = llm.get("llm_client")
+    if client and client["calls"]:
+        print(f"LLM client: {client['cache_hits']}/{client['calls']} cache hits, "
+              f"{client['retries']} retries, {client['hedges']} hedges")
+
+    print(f"\n{'Metric':<30} {'Baseline':>12} {'Current':>12} {'Change':>9}  Status")
+    print("-" * 75)
+    for metric, old, new, change, status in rows:
+        old_s = f"{old:.2f}" if old is not None else "-"
+        new_s = f"{new:.2f}" if new is not None else "-"
+        change_s = f"{change:+.1%}" if change is not None else "-"
+        print(f"{metric:<30} {old_s:>12} {new_s:>12} {change_s:>9}  {status}")
+    print()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--docs", type=int, default=4, help="synthetic documents to ingest")
+    parser.add_argument("--pages", type=int, default=30, help="pages per synthetic document")
+    parser.add_argument("--corpus", help="directory of real PDFs to use instead of synthetic ones")
+    parser.add_argument("--rounds", type=int, default=10, help="passes over the question set")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes; the median is reported")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--shards", type=int, default=1, help="vector index shards (VECTOR_SHARDS)")
+    # Service times dominate real requests; with all of them at 0 timings are interpreter noise
+    parser.add_argument("--embed-latency-ms", type=float, default=2.0, help="simulated overhead per encode() call")
+    parser.add_argument("--embed-per-text-ms", type=float, default=1.0, help="simulated time per text encoded")
+    parser.add_argument("--llm-latency-ms", type=float, default=20.0, help="simulated time per LLM completion")
+    parser.add_argument("--llm-per-1k-tokens-ms", type=float, default=10.0, help="simulated prefill time per 1k prompt tokens")
+    parser.add_argument("--index-latency-ms", type=float, default=10.0, help="simulated time per index query/upsert")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--update-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative change of timed metrics before failing")
+    parser.add_argument("--count-tolerance", type=float, default=0.05, help="allowed relative change of service-call counters")
+    parser.add_argument("--output", help="also write full results as JSON here")
+    parser.add_argument("--verbose", action="store_true", help="show pipeline/agent output")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+        print_report(results, compare(results, {}, args.tolerance, args.count_tolerance))
+        print(f"Baseline written to {baseline_path}")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    if baseline and baseline.get("config") != results["config"]:
+        print("Warning: baseline was recorded with a different config; comparison is approximate")
+
+    rows = compare(results, baseline, args.tolerance, args.count_tolerance)
+    print_report(results, rows)
+
+    regressions = [row[0] for row in rows if row[4] == "REGRESSION"]
+    if regressions:
+        print(f"❌ Regression in: {', '.join(regressions)}")
+        return 1
+    print("✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,480 @@
+"""Deterministic local stand-ins for the external services used by src/
+
+install() registers fake `sentence_transformers`, `pinecone`, `groq` and
+`langchain_groq` modules in sys.modules. It must run BEFORE anything from
+src/ is imported, so that vector_store, agents.nodes and query pick up the
+stand-ins instead of downloading a model or calling a remote API.
+"""
+import hashlib
+import re
+import sys
+import threading
+import time
+import types
+from functools import lru_cache
+
+import numpy as np
+
+EMBEDDING_DIM = 384  # same as all-MiniLM-L6-v2
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class ServiceStats:
+    """Counters shared by all stand-ins (thread safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.embed_calls = 0
+            self.embed_texts = 0
+            self.index_upserts = 0
+            self.index_queries = 0
+            self.llm_calls = 0
+            self.llm_prompt_tokens = 0
+            self.llm_completion_tokens = 0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "embed_calls": self.embed_calls,
+                "embed_texts": self.embed_texts,
+                "index_upserts": self.index_upserts,
+                "index_queries": self.index_queries,
+                "llm_calls": self.llm_calls,
+                "llm_prompt_tokens": self.llm_prompt_tokens,
+                "llm_completion_tokens": self.llm_completion_tokens,
+            }
+
+
+stats = ServiceStats()
+
+# Simulated size of the embedding model weights (MB), set through install()
+_model_mb = 0
+
+# Simulated service time, set through install()
+_latency = {
+    "embed_ms": 0.0,       # per encode() call (dispatch, tokenizer setup)
+    "embed_text_ms": 0.0,  # per text encoded: the forward pass scales with the batch
+    "llm_ms": 0.0,         # per completion
+    "llm_per_1k_ms": 0.0,  # extra per 1k prompt tokens (prefill cost)
+    "index_ms": 0.0,       # per index query / upsert (a Pinecone round trip)
+}
+
+
+def _sleep_ms(ms: float):
+    if ms > 0:
+        time.sleep(ms / 1000)
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count (~4 chars per token), matches what Groq bills closely enough"""
+    return max(1, len(text) // 4)
+
+
+# ===== EMBEDDINGS =====
+@lru_cache(maxsize=65536)
+def _token_slot(token: str):
+    digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % EMBEDDING_DIM, 1.0 if (value >> 32) & 1 else -1.0
+
+
+# Real sentence embeddings never come out orthogonal; every pair of
+# English sentences has some positive similarity. A shared component
+# reproduces that floor so the agent graph takes the answer path.
+_SHARED = np.ones(EMBEDDING_DIM, dtype=np.float32) / np.sqrt(EMBEDDING_DIM)
+
+
+def _embed_one(text: str) -> np.ndarray:
+    vec = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for token in _TOKEN_RE.findall(text.lower()):
+        slot, sign = _token_slot(token)
+        vec[slot] += sign
+    norm = np.linalg.norm(vec)
+    if norm > 0:
+        vec /= norm
+    vec = vec + _SHARED
+    return vec / np.linalg.norm(vec)
+
+
+class SentenceTransformer:
+    """Hashed bag-of-words embedder with the SentenceTransformer.encode() API"""
+
+    def __init__(self, model_name_or_path: str = "", **kwargs):
+        self.model_name = model_name_or_path
+        # Stand-in for the weight tensors (all-MiniLM-L6-v2 is ~90MB in float32);
+        # filled so the pages are really resident, read-only afterwards like weights
+        self.weights = np.ones(_model_mb * 1024 * 1024 // 4, dtype=np.float32)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return EMBEDDING_DIM
+
+    def encode(self, sentences, convert_to_tensor: bool = False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        _sleep_ms(_latency["embed_ms"] + _latency["embed_text_ms"] * len(texts))
+        stats.add(embed_calls=1, embed_texts=len(texts))
+
+        if not texts:
+            return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        matrix = np.vstack([_embed_one(t) for t in texts])
+        return matrix[0] if single else matrix
+
+
+# ===== VECTOR INDEX =====
+class _Match:
+    __slots__ = ("id", "score", "metadata", "values")
+
+    def __init__(self, id, score, metadata, values=None):
+        self.id = id
+        self.score = score
+        self.metadata = metadata
+        self.values = values or []
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+
+class _QueryResponse:
+    def __init__(self, matches, namespace=""):
+        self.matches = matches
+        self.namespace = namespace
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+
+class _FetchResponse:
+    def __init__(self, vectors, namespace=""):
+        self.vectors = vectors
+        self.namespace = namespace
+
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+
+class _Namespace:
+    def __init__(self):
+        self.ids = []
+        self.positions = {}
+        self.vectors = []
+        self.metadata = []
+        self.matrix = None
+
+
+def _passes(metadata: dict, filter: dict) -> bool:
+    """Pinecone metadata filter, $eq/$ne only (a missing field is "not equal")"""
+    for key, condition in filter.items():
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        if "$eq" in condition and metadata.get(key) != condition["$eq"]:
+            return False
+        if "$ne" in condition and metadata.get(key) == condition["$ne"]:
+            return False
+    return True
+
+
+class StubIndex:
+    """In-memory cosine index with the subset of pinecone.Index used by src/"""
+
+    def __init__(self, name: str, dimension: int = EMBEDDING_DIM):
+        self.name = name
+        self.dimension = dimension
+        self._lock = threading.Lock()
+        self._namespaces = {}
+
+    def _ns(self, namespace: str) -> _Namespace:
+        return self._namespaces.setdefault(namespace or "", _Namespace())
+
+    def upsert(self, vectors, namespace: str = "", **kwargs):
+        _sleep_ms(_latency["index_ms"])
+        with self._lock:
+            ns = self._ns(namespace)
+            for v in vectors:
+                values = np.asarray(v["values"], dtype=np.float32)
+                values = values / (np.linalg.norm(values) or 1.0)
+                pos = ns.positions.get(v["id"])
+                if pos is None:
+                    ns.positions[v["id"]] = len(ns.ids)
+                    ns.ids.append(v["id"])
+                    ns.vectors.append(values)
+                    ns.metadata.append(v.get("metadata", {}))
+                else:
+                    ns.vectors[pos] = values
+                    ns.metadata[pos] = v.get("metadata", {})
+            ns.matrix = None
+        stats.add(index_upserts=1)
+        return {"upserted_count": len(vectors)}
+
+    def query(self, vector=None, top_k: int = 10, include_metadata: bool = False,
+              filter: dict = None, namespace: str = "", **kwargs):
+        stats.add(index_queries=1)
+        _sleep_ms(_latency["index_ms"])
+        with self._lock:
+            ns = self._ns(namespace)
+            if not ns.ids:
+                return _QueryResponse([], namespace)
+            if ns.matrix is None:
+                ns.matrix = np.vstack(ns.vectors)
+            matrix, ids, metadata = ns.matrix, list(ns.ids), list(ns.metadata)
+
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = matrix @ query
+
+        if filter:
+            keep = np.array([_passes(m, filter) for m in metadata])
+            scores = np.where(keep, scores, -np.inf)
+
+        k = min(top_k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        matches = [
+            _Match(ids[i], float(scores[i]), metadata[i] if include_metadata else {})
+            for i in top if np.isfinite(scores[i])
+        ]
+        return _QueryResponse(matches, namespace)
+
+    def delete(self, ids=None, namespace: str = "", **kwargs):
+        with self._lock:
+            ns = self._ns(namespace)
+            drop = {ns.positions[i] for i in ids or [] if i in ns.positions}
+            keep = [p for p in range(len(ns.ids)) if p not in drop]
+            ns.ids = [ns.ids[p] for p in keep]
+            ns.vectors = [ns.vectors[p] for p in keep]
+            ns.metadata = [ns.metadata[p] for p in keep]
+            ns.positions = {vid: p for p, vid in enumerate(ns.ids)}
+            ns.matrix = None
+        return {}
+
+    def list(self, prefix: str = None, namespace: str = "", limit: int = 100, **kwargs):
+        """Pages of vector ids, like the serverless list endpoint"""
+        with self._lock:
+            ids = [i for i in self._ns(namespace).ids if not prefix or i.startswith(prefix)]
+        for i in range(0, len(ids), limit):
+            yield ids[i:i + limit]
+
+    def fetch(self, ids, namespace: str = "", **kwargs):
+        with self._lock:
+            ns = self._ns(namespace)
+            vectors = {
+                i: _Match(i, 0.0, ns.metadata[ns.positions[i]], ns.vectors[ns.positions[i]].tolist())
+                for i in ids if i in ns.positions
+            }
+        return _FetchResponse(vectors, namespace)
+
+    def describe_index_stats(self, **kwargs):
+        with self._lock:
+            namespaces = {
+                name: {"vector_count": len(ns.ids)} for name, ns in self._namespaces.items() if ns.ids
+            }
+        return {
+            "dimension": self.dimension,
+            "total_vector_count": sum(n["vector_count"] for n in namespaces.values()),
+            "namespaces": namespaces,
+        }
+
+
+class _IndexDescription:
+    def __init__(self, name):
+        self.name = name
+
+
+class ServerlessSpec:
+    def __init__(self, cloud: str = "", region: str = ""):
+        self.cloud = cloud
+        self.region = region
+
+
+class Pinecone:
+    """Pinecone client stand-in; every instance sees the same indexes"""
+
+    _indexes = {}
+
+    def __init__(self, api_key: str = None, **kwargs):
+        self.api_key = api_key
+
+    def list_indexes(self):
+        return [_IndexDescription(name) for name in self._indexes]
+
+    def create_index(self, name: str, dimension: int = EMBEDDING_DIM, metric: str = "cosine", spec=None, **kwargs):
+        self._indexes.setdefault(name, StubIndex(name, dimension))
+
+    def Index(self, name: str, **kwargs):
+        # Pinecone lets you open an index handle before it is listed; mirror that
+        return self._indexes.setdefault(name, StubIndex(name))
+
+
+def reset_indexes():
+    Pinecone._indexes.clear()
+
+
+# ===== LLM =====
+class _Message:
+    def __init__(self, content):
+        self.role = "assistant"
+        self.content = content
+
+
+class _Choice:
+    def __init__(self, content):
+        self.index = 0
+        self.message = _Message(content)
+        self.finish_reason = "stop"
+
+
+class _Usage:
+    def __init__(self, prompt_tokens, completion_tokens):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.total_tokens = prompt_tokens + completion_tokens
+
+
+class _Completion:
+    def __init__(self, model, content, prompt_tokens):
+        self.model = model
+        self.choices = [_Choice(content)]
+        self.usage = _Usage(prompt_tokens, count_tokens(content))
+
+
+_SOURCE_RE = re.compile(r"\[Source (\d+)\][^\n]*\n?")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def _answer_from_context(prompt: str) -> str:
+    """Pick the context sentence sharing the most words with the question"""
+    question = prompt.rsplit("Question:", 1)[-1].strip().split("\n", 1)[0]
+    question_tokens = set(_TOKEN_RE.findall(question.lower()))
+
+    best, best_source, best_overlap = "", 1, 0
+    source = 1
+    context = prompt.split("Question:", 1)[0]
+    context = context.split("Context:", 1)[-1]
+    for line in context.splitlines():
+        marker = _SOURCE_RE.match(line)
+        if marker:
+            source = int(marker.group(1))
+        for sentence in _SENTENCE_RE.split(line):
+            overlap = len(question_tokens & set(_TOKEN_RE.findall(sentence.lower())))
+            if overlap > best_overlap:
+                best, best_source, best_overlap = sentence.strip(), source, overlap
+
+    if not best:
+        return "I cannot find this information in the document."
+    return f"{best} [Source {best_source}]"
+
+
+def _respond(messages) -> str:
+    prompt = "\n".join(m["content"] for m in messages)
+    if "SEARCH or GENERAL" in prompt:
+        return "SEARCH"
+    if "hallucinated" in prompt:
+        return "NO\nEvery figure in the answer appears in the sources."
+    return _answer_from_context(prompt)
+
+
+class _Completions:
+    def create(self, model: str = "", messages=None, temperature: float = 1.0, **kwargs):
+        messages = messages or []
+        prompt_tokens = sum(count_tokens(m["content"]) for m in messages)
+        _sleep_ms(_latency["llm_ms"] + _latency["llm_per_1k_ms"] * prompt_tokens / 1000)
+
+        completion = _Completion(model, _respond(messages), prompt_tokens)
+        stats.add(
+            llm_calls=1,
+            llm_prompt_tokens=prompt_tokens,
+            llm_completion_tokens=completion.usage.completion_tokens,
+        )
+        return completion
+
+
+class _Chat:
+    def __init__(self):
+        self.completions = _Completions()
+
+
+class APIError(Exception):
+    pass
+
+
+class APIConnectionError(APIError):
+    pass
+
+
+class APITimeoutError(APIConnectionError):
+    pass
+
+
+class APIStatusError(APIError):
+    pass
+
+
+class RateLimitError(APIStatusError):
+    pass
+
+
+class InternalServerError(APIStatusError):
+    pass
+
+
+class Groq:
+    """Groq client stand-in with a rule-based, deterministic 'model'"""
+
+    def __init__(self, api_key: str = None, **kwargs):
+        self.api_key = api_key
+        self.chat = _Chat()
+
+
+class ChatGroq:
+    """langchain_groq.ChatGroq stand-in (constructed by agents.nodes, never invoked)"""
+
+    def __init__(self, **kwargs):
+        self.model = kwargs.get("model")
+        self.temperature = kwargs.get("temperature")
+
+
+# ===== INSTALL =====
+def _module(name: str, **attrs) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    module.__stub__ = True
+    return module
+
+
+def install(embed_latency_ms: float = 0.0, llm_latency_ms: float = 0.0, llm_per_1k_tokens_ms: float = 0.0,
+            model_mb: int = 0, index_latency_ms: float = 0.0, embed_per_text_ms: float = 0.0):
+    """Register the stand-ins in sys.modules (call before importing src/ modules)"""
+    global _model_mb
+    _model_mb = model_mb
+    _latency["embed_ms"] = embed_latency_ms
+    _latency["embed_text_ms"] = embed_per_text_ms
+    _latency["llm_ms"] = llm_latency_ms
+    _latency["llm_per_1k_ms"] = llm_per_1k_tokens_ms
+    _latency["index_ms"] = index_latency_ms
+
+    loaded = [name for name in ("vector_store", "llm_client", "agents.nodes", "query") if name in sys.modules]
+    if loaded:
+        raise RuntimeError(f"stubs.install() must run before importing {', '.join(loaded)}")
+
+    sys.modules["sentence_transformers"] = _module(
+        "sentence_transformers", SentenceTransformer=SentenceTransformer
+    )
+    sys.modules["pinecone"] = _module(
+        "pinecone", Pinecone=Pinecone, ServerlessSpec=ServerlessSpec
+    )
+    sys.modules["groq"] = _module(
+        "groq", Groq=Groq, APIError=APIError, APIConnectionError=APIConnectionError,
+        APITimeoutError=APITimeoutError, APIStatusError=APIStatusError,
+        RateLimitError=RateLimitError, InternalServerError=InternalServerError,
+    )
+    sys.modules["langchain_groq"] = _module("langchain_groq", ChatGroq=ChatGroq)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+"""Offline checks of streaming ingest, with the stand-ins from stubs.py
+
+* iter_chunks() over pages gives exactly the chunks of chunk_text() over the whole text
+* /ingest returns 413 when a request holds more text than its budget
+* /ingest parses at most INGEST_CONCURRENCY uploads at once
+* reports the text budget peak, peak Python allocation and RSS growth of one ingest
+
+Usage:
+    python benchmarks/test_ingest.py
+    python -m pytest benchmarks/test_ingest.py -s
+"""
+import asyncio
+import contextlib
+import functools
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+import httpx
+
+import stubs
+import corpus
+from run_benchmark import SRC_DIR, isolate_llm_cache
+
+if "vector_store" not in sys.modules:
+    stubs.install()
+sys.path.insert(0, str(SRC_DIR))
+
+_cache_dir = isolate_llm_cache()
+
+from api.main import app                     # noqa: E402
+from api import routes                       # noqa: E402
+from ingest import chunk_text, iter_chunks, INGEST_CONCURRENCY, TextBudget  # noqa: E402
+from pipeline import index_pdf               # noqa: E402
+from vector_store import get_index           # noqa: E402
+
+
+def _pages(text: str, rng: random.Random):
+    """Split text at random points, with some empty pages"""
+    cuts = sorted(rng.sample(range(len(text)), k=min(len(text), rng.randint(0, 12))))
+    pages = [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+    for _ in range(rng.randint(0, 3)):
+        pages.insert(rng.randint(0, len(pages)), "")
+    return pages
+
+
+@functools.lru_cache(maxsize=None)
+def _upload(pages: int = 6) -> bytes:
+    with tempfile.TemporaryDirectory() as tmp:
+        doc = corpus.build_corpus(tmp, docs=1, pages=pages, seed=11)[0]
+        return Path(doc["path"]).read_bytes()
+
+
+async def _post_ingest(client: httpx.AsyncClient, doc_id: str) -> httpx.Response:
+    return await client.post(
+        "/api/v1/ingest",
+        params={"doc_id": doc_id},
+        files={"file": (f"{doc_id}.pdf", _upload(), "application/pdf")},
+    )
+
+
+def _client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test", timeout=60)
+
+
+def test_iter_chunks_matches_chunk_text():
+    rng = random.Random(3)
+    for trial in range(200):
+        text = "".join(rng.choice("abcdefgh \n") for _ in range(rng.randint(0, 5000)))
+        chunk_size = rng.randint(2, 1200)
+        overlap = rng.randint(0, chunk_size - 1)
+        budget = TextBudget()
+        streamed = list(iter_chunks(_pages(text, rng), chunk_size, overlap, budget))
+        assert streamed == chunk_text(text, chunk_size, overlap), (trial, chunk_size, overlap)
+        assert budget.peak <= len(text)
+
+
+def test_over_budget_ingest_returns_413():
+    async def run():
+        async with _client() as client:
+            return await _post_ingest(client, "over_budget")
+
+    original = routes.TextBudget
+    routes.TextBudget = functools.partial(TextBudget, limit_mb=0.001)
+    try:
+        response = asyncio.run(run())
+    finally:
+        routes.TextBudget = original
+    assert response.status_code == 413, response.text
+    assert "limit" in response.json()["detail"]
+
+
+def test_ingest_concurrency_is_limited():
+    running = 0
+    most = 0
+    lock = threading.Lock()
+
+    def slow_index_pdf(*args, **kwargs):
+        nonlocal running, most
+        with lock:
+            running += 1
+            most = max(most, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return {"chunks": 0, "table_rows": 0}
+
+    async def run():
+        async with _client() as client:
+            uploads = [_post_ingest(client, f"concurrent_{i}") for i in range(INGEST_CONCURRENCY * 3)]
+            return await asyncio.gather(*uploads)
+
+    original = routes.index_pdf
+    routes.index_pdf = slow_index_pdf
+    try:
+        responses = asyncio.run(run())
+    finally:
+        routes.index_pdf = original
+    assert all(r.status_code == 200 for r in responses)
+    assert most == INGEST_CONCURRENCY, most
+
+
+def _rss_mb() -> float:
+    """Current RSS of this process (not the high-water mark: that would include earlier tests)"""
+    statm = Path("/proc/self/statm")
+    if not statm.exists():
+        return float("nan")
+    return int(statm.read_text().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def test_ingest_memory_report():
+    pdf = _upload(pages=30)
+    budget = TextBudget()
+    rss_before = _rss_mb()
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            stored = index_pdf(io.BytesIO(pdf), "memory_report", get_index(), 1000, 200, budget)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    rss_growth = _rss_mb() - rss_before
+    print(f"\nIngested {stored['chunks']} chunks, {stored['table_rows']} table rows from a "
+          f"{len(pdf) / 1024:.0f}KB PDF: text budget peak {budget.peak / 1024:.1f}KB of "
+          f"{budget.limit / 1024 / 1024:g}MB, peak Python allocation {peak / 1024 / 1024:.2f}MB, "
+          f"RSS growth {rss_growth:.1f}MB")
+    assert stored["chunks"] > 0 and stored["table_rows"] > 0
+    assert budget.peak < budget.limit
+    # Streaming: a few pages and one embedding batch at a time, not the whole document
+    assert peak < 16 * 1024 * 1024, peak
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"ok  {name}")
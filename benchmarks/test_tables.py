@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""Checks of the table heuristics in src/tables.py on hand-written page text
+
+Usage:
+    python -m pytest benchmarks/test_tables.py
+"""
+import sys
+
+from run_benchmark import SRC_DIR
+
+sys.path.insert(0, str(SRC_DIR))
+
+from tables import split_tables  # noqa: E402
+
+INCOME = [
+    "Consolidated Statements of Operations",
+    "(in millions)",
+    "Year Ended December 31, 2023 2022 2021",
+    "Revenues",
+    "Automotive sales 78,509 67,210 44,125",
+    "Energy generation and storage 6,035 3,909 2,789",
+    "Total revenues 96,773 81,462 53,823",
+]
+BALANCE = [
+    "Consolidated Balance Sheets",
+    "December 31, 2023 December 31, 2022",
+    "Cash and cash equivalents 16,398 16,253",
+    "Accounts receivable, net 3,508 2,952",
+    "Inventory 13,626 12,839",
+]
+
+
+def _pages(*pages):
+    """split_tables over consecutive pages, passing the state along; rows of every page"""
+    rows = []
+    continued = None
+    for number, lines in enumerate(pages, start=1):
+        page_rows, _, continued = split_tables("\n".join(lines), number, continued)
+        rows.extend(page_rows)
+    return rows
+
+
+def _by_label(rows):
+    return {row["label"]: row for row in rows}
+
+
+def test_year_header_names_columns():
+    rows = _by_label(_pages(["Some prose before the table."] + INCOME))
+    assert set(rows) == {"Automotive sales", "Energy generation and storage", "Total revenues"}
+    total = rows["Total revenues"]
+    assert total["columns"] == ["2023", "2022", "2021"]
+    assert total["title"] == "Consolidated Statements of Operations (in millions)"
+    assert rows["Automotive sales"]["section"] == "Revenues"
+
+
+def test_repeated_date_header_names_columns():
+    rows = _pages(BALANCE)
+    assert [row["label"] for row in rows] == ["Cash and cash equivalents", "Accounts receivable, net", "Inventory"]
+    assert all(row["columns"] == ["2023", "2022"] for row in rows)
+
+
+def test_table_continues_past_page_number_footer():
+    rows = _by_label(_pages(INCOME[:6] + ["", "45"], INCOME[6:] + ["46"]))
+    total = rows["Total revenues"]
+    assert total["page"] == 2
+    assert total["columns"] == ["2023", "2022", "2021"]
+    assert total["title"] == "Consolidated Statements of Operations (in millions)"
+
+
+def test_table_continues_past_running_header_and_footer():
+    header = "Contoso Energy, Inc. | 2023 Form 10-K"
+    rows = _by_label(_pages(
+        [header, "Some prose before the table."] + BALANCE[:4] + ["Page 45 of 120"],
+        [header] + BALANCE[3:] + ["Page 46 of 120"],
+    ))
+    inventory = rows["Inventory"]
+    assert inventory["page"] == 2
+    assert inventory["columns"] == ["2023", "2022"]
+    assert inventory["title"] == "Consolidated Balance Sheets"
+    assert inventory["section"] == ""
+
+
+def test_header_at_page_foot_continues():
+    rows = _pages(INCOME[:3] + ["44"], INCOME[3:] + ["45"])
+    assert len(rows) == 3
+    assert all(row["columns"] == ["2023", "2022", "2021"] and row["page"] == 2 for row in rows)
+
+
+def test_prose_after_table_ends_it():
+    rows = _by_label(_pages(
+        INCOME[:6] + ["Revenue grew on higher deliveries.", "45"],
+        ["Other income 1,000 900 800", "Interest expense 50 40 30", "46"],
+    ))
+    assert rows["Other income"]["columns"] == ["col1", "col2", "col3"]
+    assert rows["Other income"]["title"] == ""
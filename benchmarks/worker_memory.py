@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""Per-worker memory of the multi-worker server, with and without preload
+
+Starts src/api/server.py (stand-in services, stand-in model weights of
+--model-mb), sends some traffic so every worker has imported and run the
+app, then reads /proc/<pid>/smaps_rollup for the parent and each worker.
+
+RSS counts shared pages in full for every process, so it overstates what a
+worker costs. PSS splits shared pages between the processes that map them
+and USS is memory only that process holds; PSS summed over all processes is
+the real footprint of the server. Linux only.
+
+Usage:
+    python benchmarks/worker_memory.py --workers 1,2,4 --model-mb 90
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+import corpus
+from run_benchmark import SRC_DIR
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _children(pid: int):
+    kids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            stat = Path(f"/proc/{entry}/stat").read_text()
+        except OSError:
+            continue
+        # Field 4 is the ppid; the command name (field 2) may contain spaces
+        if int(stat.rsplit(")", 1)[1].split()[1]) == pid:
+            kids.append(int(entry))
+    return sorted(kids)
+
+
+def memory_kb(pid: int) -> dict:
+    """RSS / PSS / USS of one process from smaps_rollup, in KiB"""
+    fields = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(":", 1)
+        fields[name] = int(value.split()[0])
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def measure(workers: int, preload: bool, model_mb: int, requests: int) -> dict:
+    port = _free_port()
+    code = (
+        f"import sys; sys.path[:0] = [{str(Path(__file__).parent)!r}, {str(SRC_DIR)!r}]\n"
+        f"import stubs; stubs.install(model_mb={model_mb})\n"
+        f"from api.server import serve\n"
+        f"serve(host='127.0.0.1', port={port}, workers={workers}, preload={preload})\n"
+    )
+    env = dict(os.environ, LLM_CACHE_ENABLED="0")
+    server = subprocess.Popen([sys.executable, "-c", code], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        url = f"http://127.0.0.1:{port}/api/v1"
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                if httpx.get(f"{url}/health", timeout=5).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline or server.poll() is not None:
+                raise RuntimeError("server did not come up")
+            time.sleep(0.2)
+
+        # New connection per request so the kernel spreads them over the workers
+        for i in range(requests):
+            httpx.post(f"{url}/query", json={"query": corpus.QUESTIONS[i % len(corpus.QUESTIONS)]}, timeout=30)
+
+        parent = memory_kb(server.pid)
+        workers_mem = [memory_kb(pid) for pid in _children(server.pid)]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    total_pss = parent["pss"] + sum(w["pss"] for w in workers_mem)
+    return {
+        "workers": workers,
+        "preload": preload,
+        "parent_kb": parent,
+        "worker_kb": workers_mem,
+        "mean_worker_rss_mb": round(sum(w["rss"] for w in workers_mem) / len(workers_mem) / 1024, 1),
+        "mean_worker_pss_mb": round(sum(w["pss"] for w in workers_mem) / len(workers_mem) / 1024, 1),
+        "mean_worker_uss_mb": round(sum(w["uss"] for w in workers_mem) / len(workers_mem) / 1024, 1),
+        "total_pss_mb": round(total_pss / 1024, 1),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--workers", default="1,2,4", help="comma separated worker counts")
+    parser.add_argument("--model-mb", type=int, default=90, help="size of the stand-in model weights")
+    parser.add_argument("--requests", type=int, default=40, help="queries sent before measuring")
+    parser.add_argument("--output", help="write results as JSON here")
+    args = parser.parse_args(argv)
+
+    if not Path("/proc/self/smaps_rollup").exists():
+        print("smaps_rollup not available (Linux 4.14+ only)")
+        return 1
+
+    results = []
+    print(f"\n{'Workers':<9} {'Preload':<9} {'RSS/worker':>11} {'PSS/worker':>11} {'USS/worker':>11} {'Total PSS':>10}")
+    print("-" * 70)
+    for workers in [int(w) for w in args.workers.split(",") if w]:
+        for preload in (False, True):
+            r = measure(workers, preload, args.model_mb, args.requests)
+            results.append(r)
+            print(f"{workers:<9} {'on' if preload else 'off':<9} {r['mean_worker_rss_mb']:>9.1f}MB "
+                  f"{r['mean_worker_pss_mb']:>9.1f}MB {r['mean_worker_uss_mb']:>9.1f}MB {r['total_pss_mb']:>8.1f}MB")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import os
+import asyncio
+from typing import List, Tuple, AsyncIterator, Optional
+from concurrent.futures import ThreadPoolExecutor
+from vector_store import get_cached_embeddings
+from .nodes import search_chunks
+from .state import AgentState
+from .workflow import agent_graph
+
+# Questions answered at once (each one makes up to 3 LLM calls)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# Own pool: the event loop's default one is sized by CPU count, not by LLM waits
+_answer_pool = ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY, thread_name_prefix="batch-answer")
+
+def retrieve_batch(queries: List[str], top_k: int = 10) -> Tuple[List[List[dict]], int]:
+    """Embed all questions in one pass and search for them concurrently
+
+    Returns the chunks for each question and the number of distinct chunks.
+    Chunks shared between questions share their text, and their sentences are
+    embedded once by the context builder's cache.
+    """
+    vectors = get_cached_embeddings(queries)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(BATCH_CONCURRENCY, len(queries)))) as pool:
+        results = list(pool.map(lambda v: search_chunks(v.tolist(), top_k), vectors))
+
+    # Keep one copy of each chunk's text; scores stay per question
+    texts = {}
+    for chunks in results:
+        for chunk in chunks:
+            chunk["text"] = texts.setdefault(chunk["id"], chunk["text"])
+
+    return results, len(texts)
+
+def answer_one(query: str, chunks: List[dict]) -> dict:
+    """Run the agent workflow for one question with its chunks already retrieved"""
+    initial_state = AgentState(
+        query=query,
+        retrieved_chunks=chunks,
+        retrieval_score=0.0,
+        figures=[],
+        context="",
+        context_tokens=0,
+        tokens_saved=0,
+        answer="",
+        answer_confidence=0.0,
+        has_hallucination=False,
+        verification_notes="",
+        step_count=0,
+        error=""
+    )
+    return agent_graph.invoke(initial_state)
+
+async def answer_batch(
+    queries: List[str],
+    retrieved: List[List[dict]],
+    concurrency: int = BATCH_CONCURRENCY
+) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (index, result, error) for each question as soon as it is answered"""
+    loop = asyncio.get_running_loop()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def run(i: int):
+        async with limit:
+            try:
+                result = await loop.run_in_executor(_answer_pool, answer_one, queries[i], retrieved[i])
+                return i, result, None
+            except Exception as e:
+                return i, None, str(e)
+
+    tasks = [asyncio.create_task(run(i)) for i in range(len(queries))]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        # Client went away mid-stream: don't start the questions still waiting
+        for task in tasks:
+            task.cancel()
@@ -1,9 +1,12 @@
 from typing import List
 from langchain_groq import ChatGroq
-from groq import Groq
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from vector_store import get_embedding, pc, INDEX_NAME
+from vector_store import get_cached_embeddings, get_index
+from context_builder import build_context, count_tokens
+from llm_client import complete
 
 load_dotenv()
 
@@ -14,8 +17,23 @@ llm = ChatGroq(
     temperature=0.3
 )
 
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-index = pc.Index(INDEX_NAME)
+index = get_index()
+
+_YEAR = re.compile(r"\b(?:19|20)\d{2}\b")
+_WORD = re.compile(r"[a-z]{3,}")
+_STOPWORDS = {"the", "and", "for", "what", "was", "were", "how", "much", "many", "did", "does", "total"}
+# Questions worth a table-row lookup: a year, a number, or a line-item word
+_FIGURE_HINT = re.compile(
+    r"\d|\b(?:revenue|sales|income|profit|loss|earnings|eps|margin|cost|expense|cash|asset|liabilit|debt"
+    r"|equity|dividend|total|how much|how many|amount|percent)", re.IGNORECASE
+)
+
+# Figure lookups run beside the text search instead of after it
+_figures_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="figures")
+
+def _words(text: str) -> set:
+    """Content words, plural "s" dropped, for matching a query against row labels"""
+    return {w.rstrip("s") for w in _WORD.findall(text.lower()) if w not in _STOPWORDS}
 
 # ===== NODE 1: ROUTER =====
 def router_node(state: dict) -> dict:
@@ -28,13 +46,7 @@ def router_node(state: dict) -> dict:
     
     Respond with only: SEARCH or GENERAL"""
     
-    response = groq_client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0
-    )
-    
-    decision = response.choices[0].message.content.strip()
+    decision = complete(prompt, model="llama-3.1-8b-instant", temperature=0).strip()
     
     print(f"Router: {decision}")
     
@@ -42,39 +54,116 @@ def router_node(state: dict) -> dict:
     return state
 
 # ===== NODE 2: RETRIEVER =====
-def retriever_node(state: dict) -> dict:
-    """Retrieves relevant chunks from vector DB"""
-    query = state["query"]
-    
-    print(f"Retrieving chunks for: {query}")
-    
-    # Get embedding
-    query_embedding = get_embedding(query)
-    
-    # Search with higher top_k for better coverage
+def search_chunks(query_embedding: List[float], top_k: int = 10) -> List[dict]:
+    """Query the vector DB for text chunks and return matches as chunk dicts"""
+    # Table rows are looked up separately (lookup_figures); "$ne" also keeps
+    # chunks stored before they were tagged "type": "text"
     results = index.query(
         vector=query_embedding,
-        top_k=10,  # Increased from 5
-        include_metadata=True
+        top_k=top_k,
+        include_metadata=True,
+        filter={"type": {"$ne": "table_row"}}
     )
     
-    # Calculate average score
-    avg_score = sum(m.score for m in results.matches) / len(results.matches) if results.matches else 0
-    
-    # Store chunks
-    state["retrieved_chunks"] = [
+    return [
         {
             "text": m.metadata["text"],
             "score": m.score,
             "doc_id": m.metadata["doc_id"],
-            "chunk_id": m.metadata["chunk_id"]
+            "chunk_id": m.metadata["chunk_id"],
+            "char_start": m.metadata.get("char_start"),
+            "type": m.metadata.get("type", "text"),
+            "id": m.id
         }
         for m in results.matches
     ]
+
+def wants_figures(query: str) -> bool:
+    """Whether a query asks for something a financial table could answer"""
+    return _FIGURE_HINT.search(query) is not None
+
+def lookup_figures(query: str, top_k: int = 3, query_embedding: List[float] = None) -> List[dict]:
+    """Exact figures for a query from indexed table rows
+
+    Searches table rows only, keeps rows whose label shares a word with the
+    query (best label match first), and narrows their values to the years
+    the query mentions.
+    """
+    if query_embedding is None:
+        query_embedding = get_cached_embeddings([query])[0].tolist()
+    # Over-fetch: similar rows (revenues / cost of revenues) are re-ranked by label below
+    results = index.query(
+        vector=query_embedding,
+        top_k=top_k * 4,
+        include_metadata=True,
+        filter={"type": {"$eq": "table_row"}}
+    )
+    
+    words = _words(query)
+    years = set(_YEAR.findall(query))
+    
+    ranked = []
+    for m in results.matches:
+        label = m.metadata["label"]
+        label_words = _words(label)
+        if not words & label_words:
+            continue
+        cells = list(zip(m.metadata["columns"], m.metadata["values"]))
+        asked = [(c, v) for c, v in cells if c in years]
+        figure = {
+            "doc_id": m.metadata["doc_id"],
+            "page": m.metadata.get("page"),
+            "table": m.metadata.get("title", ""),
+            "label": label,
+            "values": dict(asked or cells),
+            "score": m.score
+        }
+        # "total revenues" should beat "total cost of revenues" for a revenue question
+        ranked.append((len(words & label_words) / len(label_words), m.score, figure))
+    ranked.sort(key=lambda r: r[:2], reverse=True)
+    return [figure for _, _, figure in ranked[:top_k]]
+
+def format_figures(figures: List[dict]) -> str:
+    """Figures block for prompts, one line per table row"""
+    lines = [
+        f"- {f['label']} ({f['table'] or 'table'}, {f['doc_id']} p.{f['page']}): "
+        + "; ".join(f"{c} = {v}" for c, v in f["values"].items())
+        for f in figures
+    ]
+    return "[Figures from tables]:\n" + "\n".join(lines) if lines else ""
+
+def retriever_node(state: dict) -> dict:
+    """Retrieves relevant chunks from vector DB"""
+    query = state["query"]
+    
+    # Get embedding (cached, so the answerer's context builder re-uses it)
+    query_embedding = get_cached_embeddings([query])[0].tolist()
+    
+    # Exact figures straight from table rows, for questions like "total revenue 2023",
+    # searched alongside the text; skipped for questions no table row could answer
+    figures = None
+    if wants_figures(query):
+        figures = _figures_pool.submit(lookup_figures, query, 3, query_embedding)
+    
+    if state["retrieved_chunks"]:
+        # Already fetched (batch queries retrieve for all questions up front)
+        chunks = state["retrieved_chunks"]
+    else:
+        print(f"Retrieving chunks for: {query}")
+        
+        # Search with higher top_k for better coverage
+        chunks = search_chunks(query_embedding, top_k=10)  # Increased from 5
+    
+    state["figures"] = figures.result() if figures is not None else []
+    
+    # Calculate average score
+    avg_score = sum(c["score"] for c in chunks) / len(chunks) if chunks else 0
+    
+    state["retrieved_chunks"] = chunks
     state["retrieval_score"] = avg_score
     state["step_count"] += 1
     
-    print(f"Retrieved {len(results.matches)} chunks (avg score: {avg_score:.4f})")
+    print(f"Retrieved {len(chunks)} chunks (avg score: {avg_score:.4f}), {len(state['figures'])} table figures")
     
     return state
 
@@ -86,11 +175,15 @@ def answerer_node(state: dict) -> dict:
     
     print(f"Generating answer...")
     
-    # Build context
-    context = "\n\n".join([
-        f"[Source {i+1}] (Score: {c['score']:.3f}):\n{c['text']}"
-        for i, c in enumerate(chunks[:5])  # Top 5 only
-    ])
+    # Build context: query-relevant sentences of the top 5, within the token budget
+    built = build_context(query, chunks[:5])
+    figures = format_figures(state["figures"])
+    context = "\n\n".join(part for part in (figures, built["text"]) if part)
+    state["context"] = context
+    state["context_tokens"] = count_tokens(context)
+    state["tokens_saved"] = built["tokens_saved"]
+    
+    print(f"Context: {built['tokens']} tokens ({built['tokens_saved']} saved)")
     
     prompt = f"""You are a financial document analyst. Answer the question using ONLY the provided sources.
 
@@ -101,19 +194,13 @@ Question: {query}
 
 Instructions:
 - Answer based ONLY on the context
-- Cite source numbers [Source X]
+- Cite source numbers [Source X]; prefer the table figures for exact numbers
 - If information is not in context, say "I cannot find this information"
 - Be specific with numbers and facts
 
 Answer:"""
     
-    response = groq_client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3
-    )
-    
-    answer = response.choices[0].message.content
+    answer = complete(prompt, model="llama-3.1-8b-instant", temperature=0.3)
     
     # Simple confidence scoring
     if "cannot find" in answer.lower() or "not in" in answer.lower():
@@ -135,12 +222,11 @@ Answer:"""
 def verifier_node(state: dict) -> dict:
     """Checks for hallucinations by comparing answer to sources"""
     answer = state["answer"]
-    chunks = state["retrieved_chunks"]
     
     print(f"Verifying answer...")
     
-    # Build source text
-    source_text = "\n".join([c["text"] for c in chunks[:5]])
+    # Check against the same context the answer was generated from
+    source_text = state["context"]
     
     prompt = f"""Compare the answer to the source documents. Check if the answer contains information NOT present in the sources.
 
@@ -153,13 +239,7 @@ Answer:
 Does the answer contain hallucinated information (facts not in sources)?
 Respond with: YES or NO, followed by brief explanation."""
     
-    response = groq_client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0
-    )
-    
-    verification = response.choices[0].message.content
+    verification = complete(prompt, model="llama-3.1-8b-instant", temperature=0)
     
     has_hallucination = "YES" in verification.split("\n")[0].upper()
     
@@ -9,6 +9,12 @@ class AgentState(TypedDict):
     # Retrieved context
     retrieved_chunks: List[dict]
     retrieval_score: float
+    figures: List[dict]  # exact table figures for the query
+    
+    # Prompt context built from the chunks (shared by answerer and verifier)
+    context: str
+    context_tokens: int
+    tokens_saved: int
     
     # Generated answer
     answer: str
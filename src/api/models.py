@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Dict, Optional, Annotated
 
 class QueryRequest(BaseModel):
     query: str = Field(..., min_length=1, max_length=500, description="User question")
@@ -12,8 +12,42 @@ class QueryResponse(BaseModel):
     retrieval_score: float
     steps_taken: int
     has_hallucination: bool
+    context_tokens: int = 0
+    tokens_saved: int = 0
     sources: List[dict]
 
+class BatchQueryRequest(BaseModel):
+    queries: List[Annotated[str, Field(min_length=1, max_length=500)]] = Field(
+        ..., min_length=1, max_length=200, description="Questions to answer"
+    )
+    stream: bool = Field(False, description="Stream results as NDJSON, in completion order")
+
+class BatchQueryItem(BaseModel):
+    index: int
+    result: Optional[QueryResponse] = None
+    error: Optional[str] = None
+
+class BatchQueryResponse(BaseModel):
+    count: int
+    unique_chunks: int
+    results: List[BatchQueryItem]
+
+class FigureRequest(BaseModel):
+    query: str = Field(..., min_length=1, max_length=500, description="Figure to look up, e.g. 'total revenues 2023'")
+    top_k: int = Field(3, ge=1, le=20, description="Number of table rows to return")
+
+class Figure(BaseModel):
+    doc_id: str
+    page: Optional[int] = None
+    table: str = ""
+    label: str
+    values: Dict[str, str]
+    score: float
+
+class FigureResponse(BaseModel):
+    query: str
+    figures: List[Figure]
+
 class IngestRequest(BaseModel):
     doc_id: str = Field(..., min_length=1, max_length=100)
     # Will handle file upload separately
@@ -23,6 +57,7 @@ class IngestResponse(BaseModel):
     status: str
     chunks_created: int
     chunks_stored: int
+    table_rows_stored: int = 0
 
 class HealthResponse(BaseModel):
     status: str
@@ -1,15 +1,47 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File
-from api.models import QueryRequest, QueryResponse, IngestRequest, IngestResponse, HealthResponse
+from fastapi.responses import StreamingResponse
+from api.models import (
+    QueryRequest, QueryResponse, BatchQueryRequest, BatchQueryItem, BatchQueryResponse,
+    FigureRequest, FigureResponse, IngestRequest, IngestResponse, HealthResponse
+)
 from agents.workflow import agent_graph
 from agents.state import AgentState
-from ingest import extract_text_from_pdf, chunk_text
-from vector_store import initialize_index, upsert_chunks, pc, INDEX_NAME
-from pathlib import Path
-import tempfile
-import shutil
+from agents.batch import retrieve_batch, answer_batch
+from agents.nodes import lookup_figures
+from ingest import TextBudget, TextLimitExceeded, INGEST_CONCURRENCY
+from pipeline import index_pdf
+from vector_store import initialize_index, get_index
+import asyncio
 
 router = APIRouter()
 
+# Shared by every ingest request in this process: each one holds a parsed PDF
+# page, its text budget and an embedding batch, so only a few run at once
+_ingest_slots = asyncio.Semaphore(INGEST_CONCURRENCY)
+
+def to_query_response(query: str, result: dict) -> QueryResponse:
+    """Format a workflow result for the API"""
+    return QueryResponse(
+        query=query,
+        answer=result["answer"],
+        confidence=result.get("answer_confidence", 0.0),
+        retrieval_score=result.get("retrieval_score", 0.0),
+        steps_taken=result["step_count"],
+        has_hallucination=result.get("has_hallucination", False),
+        context_tokens=result.get("context_tokens", 0),
+        tokens_saved=result.get("tokens_saved", 0),
+        sources=[
+            {
+                "doc_id": chunk["doc_id"],
+                "chunk_id": chunk["chunk_id"],
+                "type": chunk.get("type", "text"),
+                "score": chunk["score"],
+                "text_preview": chunk["text"][:200]
+            }
+            for chunk in result.get("retrieved_chunks", [])[:5]
+        ]
+    )
+
 # ===== QUERY ENDPOINT =====
 @router.post("/query", response_model=QueryResponse)
 async def query_documents(request: QueryRequest):
@@ -21,6 +53,10 @@ async def query_documents(request: QueryRequest):
             query=request.query,
             retrieved_chunks=[],
             retrieval_score=0.0,
+            figures=[],
+            context="",
+            context_tokens=0,
+            tokens_saved=0,
             answer="",
             answer_confidence=0.0,
             has_hallucination=False,
@@ -33,27 +69,58 @@ async def query_documents(request: QueryRequest):
         result = agent_graph.invoke(initial_state)
         
         # Format response
-        return QueryResponse(
-            query=request.query,
-            answer=result["answer"],
-            confidence=result.get("answer_confidence", 0.0),
-            retrieval_score=result.get("retrieval_score", 0.0),
-            steps_taken=result["step_count"],
-            has_hallucination=result.get("has_hallucination", False),
-            sources=[
-                {
-                    "doc_id": chunk["doc_id"],
-                    "chunk_id": chunk["chunk_id"],
-                    "score": chunk["score"],
-                    "text_preview": chunk["text"][:200]
-                }
-                for chunk in result.get("retrieved_chunks", [])[:5]
-            ]
-        )
+        return to_query_response(request.query, result)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
 
+# ===== BATCH QUERY ENDPOINT =====
+@router.post("/query/batch", response_model=BatchQueryResponse)
+async def query_batch(request: BatchQueryRequest):
+    """Answer a sheet of questions: one embedding pass, concurrent retrieval and answers"""
+    
+    queries = request.queries
+    
+    try:
+        # Embed all questions together and search concurrently
+        retrieved, unique_chunks = await asyncio.to_thread(retrieve_batch, queries)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch retrieval failed: {str(e)}")
+    
+    def item(index, result, error) -> BatchQueryItem:
+        if error is not None:
+            return BatchQueryItem(index=index, error=f"Query failed: {error}")
+        return BatchQueryItem(index=index, result=to_query_response(queries[index], result))
+    
+    if request.stream:
+        # One JSON object per line as each answer completes
+        async def lines():
+            async for index, result, error in answer_batch(queries, retrieved):
+                yield item(index, result, error).model_dump_json() + "\n"
+        
+        return StreamingResponse(
+            lines(),
+            media_type="application/x-ndjson",
+            headers={"X-Unique-Chunks": str(unique_chunks)}
+        )
+    
+    items = [item(*answered) async for answered in answer_batch(queries, retrieved)]
+    items.sort(key=lambda i: i.index)
+    
+    return BatchQueryResponse(count=len(items), unique_chunks=unique_chunks, results=items)
+
+# ===== FIGURE LOOKUP ENDPOINT =====
+@router.post("/figures", response_model=FigureResponse)
+async def lookup_figure(request: FigureRequest):
+    """Exact figures from indexed financial tables, without going through the LLM"""
+    
+    try:
+        figures = await asyncio.to_thread(lookup_figures, request.query, request.top_k)
+        return FigureResponse(query=request.query, figures=figures)
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Figure lookup failed: {str(e)}")
+
 # ===== INGEST ENDPOINT =====
 @router.post("/ingest", response_model=IngestResponse)
 async def ingest_document(doc_id: str, file: UploadFile = File(...)):
@@ -64,37 +131,30 @@ async def ingest_document(doc_id: str, file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="Only PDF files supported")
     
     try:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            shutil.copyfileobj(file.file, tmp_file)
-            tmp_path = tmp_file.name
-        
-        # Extract text
-        text = extract_text_from_pdf(tmp_path)
-        
-        # Chunk text
-        chunks = chunk_text(text, chunk_size=1000, overlap=200)
-        
         # Initialize index
         index = initialize_index()
         
-        # Store chunks
-        upsert_chunks(chunks, doc_id, index)
-        
-        # Cleanup
-        Path(tmp_path).unlink()
+        # Parse straight from the upload's spooled file (memory up to 1MB, then disk):
+        # pages are extracted, chunked, embedded and stored in batches as we go,
+        # and table rows are stored as their own vectors.
+        # Runs in a thread so queries keep being served meanwhile; at most
+        # INGEST_CONCURRENCY at a time, later uploads wait for a slot.
+        async with _ingest_slots:
+            stored = await asyncio.to_thread(
+                index_pdf, file.file, doc_id, index, 1000, 200, TextBudget()
+            )
         
         return IngestResponse(
             doc_id=doc_id,
             status="success",
-            chunks_created=len(chunks),
-            chunks_stored=len(chunks)
+            chunks_created=stored["chunks"],
+            chunks_stored=stored["chunks"],
+            table_rows_stored=stored["table_rows"]
         )
     
+    except TextLimitExceeded as e:
+        raise HTTPException(status_code=413, detail=f"Ingestion failed: {str(e)}")
     except Exception as e:
-        # Cleanup on error
-        if 'tmp_path' in locals():
-            Path(tmp_path).unlink(missing_ok=True)
         raise HTTPException(status_code=500, detail=f"Ingestion failed: {str(e)}")
 
 # ===== HEALTH ENDPOINT =====
@@ -104,7 +164,7 @@ async def health_check():
     
     try:
         # Check Pinecone connection
-        index = pc.Index(INDEX_NAME)
+        index = get_index()
         stats = index.describe_index_stats()
         
         return HealthResponse(
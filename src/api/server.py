@@ -0,0 +1,143 @@
+"""Multi-worker serving with the embedding model loaded once
+
+`uvicorn --workers N` starts N fresh interpreters, and each one imports
+vector_store and loads its own copy of the SentenceTransformer weights.
+Here the parent process imports vector_store first, then binds the socket
+and forks the workers. The weight tensors stay shared copy-on-write, so
+each worker only pays for the memory it writes to. With VECTOR_SHARDS > 1
+the parent also starts the shard processes, which every worker connects to
+(and restarts one if it dies).
+
+Run:
+    python src/api/server.py --workers 4
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import uvicorn
+from shards import ShardedIndex
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, host: str, port: int, workers: int):
+    """Body of a forked worker; never returns"""
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    # N workers each running a full-width thread pool would oversubscribe the CPU
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+
+    # Pinecone/Groq clients open connections, so they are created per worker
+    from api.main import app
+
+    config = uvicorn.Config(app, host=host, port=port, reload=False)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(host: str = "0.0.0.0", port: int = 8000, workers: int = 2, preload: bool = True):
+    """Fork `workers` uvicorn workers sharing one listening socket"""
+    shards = None
+    if preload:
+        print("Preloading embedding model in parent...")
+        import vector_store  # loads the SentenceTransformer weights
+        # Start the vector shard processes here, once, for all workers to share
+        index = vector_store.get_index()
+        shards = index if isinstance(index, ShardedIndex) else None
+        # Keep the collector from touching (and so copying) every preloaded object
+        gc.collect()
+        gc.freeze()
+
+    sock = _bind(host, port)
+    children = {}  # pid -> (slot, start time)
+    stopping = False
+
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(sock, host, port, workers)
+            except BaseException:
+                traceback.print_exc()
+                os._exit(1)
+            os._exit(0)
+        children[pid] = (slot, time.monotonic())
+        print(f"Worker {slot} started (pid {pid})")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for slot in range(workers):
+        spawn(slot)
+    print(f"Serving on {host}:{port} with {workers} workers (preload={'on' if preload else 'off'})")
+
+    while children:
+        # Wait for the workers by pid: a bare os.wait() would also reap shard processes behind
+        # multiprocessing's back, leaving it to signal their old (maybe reused) pids at exit
+        exited = []
+        for pid in list(children):
+            try:
+                done, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done, status = pid, 0
+            if done:
+                exited.append((pid, status))
+        # Shard processes are reaped (is_alive) and restarted here; workers reconnect
+        if shards is not None and not stopping:
+            shards.restart_dead()
+        if not exited:
+            time.sleep(0.2)
+            continue
+
+        for pid, status in exited:
+            slot, started = children.pop(pid)
+            if stopping:
+                continue
+            if time.monotonic() - started < 1.0:
+                # Died during startup (bad config, port in use...): restarting would just spin
+                print(f"Worker {slot} (pid {pid}) failed to start, shutting down")
+                stop(None, None)
+                continue
+            # Replacing a worker is cheap: it forks from the preloaded parent
+            print(f"Worker {slot} (pid {pid}) exited with status {status}, restarting")
+            spawn(slot)
+
+    sock.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the API with N forked workers sharing one model")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--no-preload", action="store_true", help="load the model in every worker (for comparison)")
+    args = parser.parse_args()
+
+    serve(host=args.host, port=args.port, workers=args.workers, preload=not args.no_preload)
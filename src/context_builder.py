@@ -0,0 +1,113 @@
+import os
+import re
+from typing import List, Dict, Tuple
+import numpy as np
+from vector_store import get_cached_embeddings
+
+# Prompt budget for retrieved context (the 5 full chunks used to be ~2500 tokens)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))
+
+CHARS_PER_TOKEN = 4        # close enough for llama tokenizers on English prose
+MAX_SENTENCE_CHARS = 400   # tables have no full stops; cap the "sentence" size
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WHITESPACE = re.compile(r"\s+")
+
+def count_tokens(text: str) -> int:
+    """Approximate token count"""
+    return len(text) // CHARS_PER_TOKEN if text else 0
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """Split text into (start, end) sentence spans, long spans cut at line breaks"""
+    spans = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        spans.append((start, match.start()))
+        start = match.end()
+    spans.append((start, len(text)))
+
+    pieces = []
+    for start, end in spans:
+        while end - start > MAX_SENTENCE_CHARS:
+            cut = text.rfind("\n", start + 1, start + MAX_SENTENCE_CHARS)
+            if cut == -1:
+                cut = start + MAX_SENTENCE_CHARS
+            pieces.append((start, cut))
+            start = cut
+        pieces.append((start, end))
+
+    return [(s, e) for s, e in pieces if text[s:e].strip()]
+
+def _candidates(chunks: List[Dict]) -> List[Dict]:
+    """Sentences of all chunks, minus text an earlier chunk already covers"""
+    covered = {}  # doc_id -> [(char_start, char_end)] of chunks seen so far
+    seen = set()
+    candidates = []
+
+    for source, chunk in enumerate(chunks):
+        text = chunk["text"]
+        offset = chunk.get("char_start")
+        doc_ranges = covered.setdefault(chunk.get("doc_id"), [])
+
+        for start, end in split_sentences(text):
+            # Neighbouring chunks overlap by 20%; skip sentences fully inside an earlier chunk
+            if offset is not None and any(
+                lo <= offset + start and offset + end <= hi for lo, hi in doc_ranges
+            ):
+                continue
+            sentence = _WHITESPACE.sub(" ", text[start:end]).strip()
+            key = sentence.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            candidates.append({"source": source, "position": start, "text": sentence})
+
+        if offset is not None:
+            doc_ranges.append((offset, offset + len(text)))
+
+    return candidates
+
+def build_context(query: str, chunks: List[Dict], token_budget: int = CONTEXT_TOKEN_BUDGET) -> Dict:
+    """Build the sources block for a prompt from the query-relevant sentences
+
+    Returns the context text, its token count, and tokens saved compared to
+    sending every chunk whole.
+    """
+    full_tokens = sum(count_tokens(c["text"]) for c in chunks)
+    candidates = _candidates(chunks)
+
+    if not candidates:
+        return {"text": "", "tokens": 0, "full_tokens": full_tokens, "tokens_saved": full_tokens}
+
+    # One batched encode for the query and every sentence not embedded recently
+    vectors = get_cached_embeddings([query] + [c["text"] for c in candidates])
+    vectors = vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+    similarity = vectors[1:] @ vectors[0]
+
+    # Most relevant sentences first, until the budget is spent
+    selected = []
+    used = 0
+    for i in np.argsort(-similarity):
+        cost = count_tokens(candidates[i]["text"]) + 1
+        if used + cost > token_budget:
+            continue
+        selected.append(candidates[i])
+        used += cost
+
+    # Back to document order, grouped under the original source numbers
+    selected.sort(key=lambda c: (c["source"], c["position"]))
+    blocks = []
+    for source in sorted({c["source"] for c in selected}):
+        sentences = " ".join(c["text"] for c in selected if c["source"] == source)
+        score = chunks[source].get("score")
+        header = f"[Source {source + 1}] (Score: {score:.3f}):" if score is not None else f"[Source {source + 1}]:"
+        blocks.append(f"{header}\n{sentences}")
+
+    text = "\n\n".join(blocks)
+    tokens = count_tokens(text)
+    return {
+        "text": text,
+        "tokens": tokens,
+        "full_tokens": full_tokens,
+        "tokens_saved": max(0, full_tokens - tokens),
+    }
@@ -1,14 +1,77 @@
+import os
 import PyPDF2
 from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, Union
+from tables import split_tables, row_text
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    """Extract text from PDF"""
-    with open(pdf_path, 'rb') as file:
+# Most extracted text one ingest request may hold at once (pages waiting to be chunked, table rows)
+INGEST_TEXT_LIMIT_MB = float(os.getenv("INGEST_TEXT_LIMIT_MB", "64"))
+# Ingests running at once per worker process; more wait their turn
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "2"))
+
+class TextLimitExceeded(Exception):
+    """An ingest request held more extracted text than its budget allows"""
+
+class TextBudget:
+    """Character count of the extracted text one ingest request holds, with a cap
+
+    Only text buffers are counted (about a byte per character for ASCII),
+    not process memory: PyPDF2's parsed objects are dropped after each page
+    and embedding batches are fixed-size, so the text is the part that grows
+    with the document. The cap turns a pathological PDF into a 413.
+    """
+    
+    def __init__(self, limit_mb: float = INGEST_TEXT_LIMIT_MB):
+        self.limit = int(limit_mb * 1024 * 1024)
+        self.used = 0
+        self.peak = 0
+    
+    def charge(self, chars: int, what: str = "text"):
+        self.used += chars
+        self.peak = max(self.peak, self.used)
+        if self.used > self.limit:
+            raise TextLimitExceeded(
+                f"{what} needs {self.used / 1024 / 1024:.1f}MB of text, limit is {self.limit / 1024 / 1024:g}MB"
+            )
+    
+    def release(self, chars: int):
+        self.used -= chars
+
+def iter_page_texts(source: Union[str, BinaryIO]) -> Iterator[str]:
+    """Yield the text of each page of a PDF path or seekable binary stream"""
+    file = open(source, 'rb') if isinstance(source, (str, Path)) else source
+    try:
         reader = PyPDF2.PdfReader(file)
-        text = ""
         for page in reader.pages:
-            text += page.extract_text()
-    return text
+            yield page.extract_text()
+            # PyPDF2 keeps every parsed object (decoded content streams, images)
+            # for the life of the reader; drop them once the page is done
+            reader.resolved_objects.clear()
+    finally:
+        if file is not source:
+            file.close()
+
+def separate_tables(
+    pages: Iterable[str],
+    rows: List[dict],
+    budget: TextBudget = None
+) -> Iterator[str]:
+    """Pass pages through with their tables taken out; table rows are appended to `rows`
+
+    Rows carry their 1-based page number and column headers, so they can be
+    indexed on their own instead of as number soup split across chunks.
+    """
+    continued = None  # previous page: table left open at its bottom, its edge lines
+    for page, page_text in enumerate(pages, start=1):
+        page_rows, remaining, continued = split_tables(page_text, page, continued)
+        if budget is not None:
+            budget.charge(sum(len(row_text(row)) for row in page_rows), "table rows")
+        rows.extend(page_rows)
+        yield remaining
+
+def extract_text_from_pdf(pdf_path: str) -> str:
+    """Extract text from PDF"""
+    return "".join(iter_page_texts(pdf_path))
 
 def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> list:
     """Split text into overlapping chunks"""
@@ -30,6 +93,48 @@ def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> list:
     
     return chunks
 
+def iter_chunks(
+    pages: Iterable[str],
+    chunk_size: int = 1000,
+    overlap: int = 200,
+    budget: TextBudget = None
+) -> Iterator[dict]:
+    """chunk_text() over a stream of pages: same chunks, but only ~one page held at a time"""
+    step = chunk_size - overlap
+    buffer = ""        # text from offset `buffer_start` onwards
+    buffer_start = 0
+    start = 0          # offset of the next chunk
+    chunk_id = 0
+    
+    def take(end_of_text: bool):
+        nonlocal buffer, buffer_start, start, chunk_id
+        total = buffer_start + len(buffer)
+        while start < total and (end_of_text or start + chunk_size <= total):
+            local = start - buffer_start
+            yield {
+                "text": buffer[local:local + chunk_size],
+                "char_start": start,
+                "char_end": start + chunk_size,
+                "chunk_id": chunk_id
+            }
+            chunk_id += 1
+            start += step
+        # Drop text no later chunk can start in
+        drop = min(start, total) - buffer_start
+        if drop > 0:
+            if budget is not None:
+                budget.release(drop)
+            buffer = buffer[drop:]
+            buffer_start += drop
+    
+    for page_text in pages:
+        if budget is not None:
+            budget.charge(len(page_text), "page text")
+        buffer += page_text
+        yield from take(end_of_text=False)
+    
+    yield from take(end_of_text=True)
+
 if __name__ == "__main__":
     pdf_file = "data/raw/tesla_10k.pdf"  # Your PDF here
     
@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Union
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import httpx
+import groq
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+
+# Tunables (see .env.example)
+TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))              # seconds per attempt
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))   # seconds, doubles per retry
+BACKOFF_CAP = float(os.getenv("LLM_BACKOFF_CAP", "8"))
+HEDGE_AFTER_MS = float(os.getenv("LLM_HEDGE_AFTER_MS", "0"))  # 0 = no hedging
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))  # oldest pruned beyond this
+CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    str(Path(__file__).parent.parent / "data" / "cache" / "llm_cache.sqlite")
+)
+
+# Errors worth another attempt; anything else (bad request, auth) fails fast
+RETRYABLE_ERRORS = (
+    groq.APIConnectionError,   # includes APITimeoutError
+    groq.RateLimitError,
+    groq.InternalServerError,
+)
+
+# One pooled HTTP client for every call; the SDK retries are off because we retry here
+http_client = httpx.Client(
+    timeout=httpx.Timeout(TIMEOUT, connect=5.0),
+    limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+)
+client = groq.Groq(
+    api_key=os.getenv("GROQ_API_KEY"),
+    http_client=http_client,
+    timeout=TIMEOUT,
+    max_retries=0,
+)
+
+_hedge_pool = ThreadPoolExecutor(max_workers=MAX_CONNECTIONS, thread_name_prefix="llm-hedge")
+
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "cache_hits": 0, "retries": 0, "hedges": 0, "hedge_wins": 0}
+
+def _count(name: str, n: int = 1):
+    with _stats_lock:
+        _stats[name] += n
+
+def stats() -> Dict[str, int]:
+    """Counters since process start"""
+    with _stats_lock:
+        return dict(_stats)
+
+# ===== COMPLETION CACHE =====
+class CompletionCache:
+    """SQLite-backed cache of completion text, safe across threads and forked workers
+
+    Recent entries are also kept in memory so hot prompts skip the database.
+    The table keeps the newest `max_entries`; older ones are pruned every
+    tenth of that many writes. A database error (locked, disk full) is
+    logged and treated as a miss: it never fails the completion.
+    """
+
+    def __init__(self, path: str, memory_size: int = 1024, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._writes = 0
+
+    def _connection(self):
+        # A connection must not cross fork(); each worker process opens its own
+        if self._conn is None or self._pid != os.getpid():
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # A lost entry after a power cut is just a cache miss; skip the fsync per write
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions (key TEXT PRIMARY KEY, content TEXT, created REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS completions_created ON completions (created)")
+            self._pid = os.getpid()
+            self._writes = 0
+        return self._conn
+
+    def _prune(self, conn):
+        conn.execute(
+            "DELETE FROM completions WHERE created <= "
+            "(SELECT created FROM completions ORDER BY created DESC LIMIT 1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def _remember(self, key: str, content: str):
+        self._memory[key] = content
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            try:
+                row = self._connection().execute(
+                    "SELECT content FROM completions WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                print(f"LLM cache read failed ({type(e).__name__}: {e}), treating as a miss")
+                return None
+            if row:
+                self._remember(key, row[0])
+        return row[0] if row else None
+
+    def put(self, key: str, content: str):
+        with self._lock:
+            self._remember(key, content)
+            try:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO completions VALUES (?, ?, ?)", (key, content, time.time())
+                )
+                self._writes += 1
+                if self._writes % max(1, self.max_entries // 10) == 0:
+                    self._prune(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"LLM cache write failed ({type(e).__name__}: {e}), entry kept in memory only")
+
+def cache_key(model: str, messages: List[Dict], temperature: float) -> str:
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature}, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+cache = CompletionCache(CACHE_PATH) if CACHE_ENABLED else None
+
+# ===== CALLS =====
+def _create(model: str, messages: List[Dict], temperature: float) -> str:
+    response = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature
+    )
+    return response.choices[0].message.content
+
+def _hedged(model: str, messages: List[Dict], temperature: float) -> str:
+    """Send a second identical request if the first is slower than HEDGE_AFTER_MS; first answer wins"""
+    first = _hedge_pool.submit(_create, model, messages, temperature)
+    done, _ = wait([first], timeout=HEDGE_AFTER_MS / 1000)
+    if done:
+        return first.result()
+
+    _count("hedges")
+    second = _hedge_pool.submit(_create, model, messages, temperature)
+    pending = {first, second}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is second:
+                    _count("hedge_wins")
+                # The loser keeps running in the pool; its result is dropped
+                return future.result()
+            error = error or future.exception()
+    raise error
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff"""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+def complete(
+    messages: Union[str, List[Dict]],
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0.3
+) -> str:
+    """Chat completion text, cached for temperature 0, with retries and optional hedging"""
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    _count("calls")
+
+    # Only deterministic calls are safe to replay
+    key = None
+    if cache is not None and temperature == 0:
+        key = cache_key(model, messages, temperature)
+        cached = cache.get(key)
+        if cached is not None:
+            _count("cache_hits")
+            return cached
+
+    call = _hedged if HEDGE_AFTER_MS > 0 else _create
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            content = call(model, messages, temperature)
+            break
+        except RETRYABLE_ERRORS as e:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = _backoff(attempt)
+            _count("retries")
+            print(f"LLM call failed ({type(e).__name__}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+
+    if key is not None:
+        cache.put(key, content)
+    return content
@@ -1,6 +1,31 @@
-from ingest import extract_text_from_pdf, chunk_text
-from vector_store import initialize_index, upsert_chunks
+from ingest import iter_page_texts, iter_chunks, separate_tables, TextBudget
+from vector_store import initialize_index, upsert_chunks, upsert_table_rows, delete_vectors
 from pathlib import Path
+from typing import BinaryIO, Dict, Union
+
+def index_pdf(
+    source: Union[str, BinaryIO],
+    doc_id: str,
+    index,
+    chunk_size: int = 2000,
+    overlap: int = 400,
+    budget: TextBudget = None
+) -> Dict[str, int]:
+    """Stream a PDF (path or seekable stream) into the index page by page
+
+    Tables are taken out of the page text and stored as one vector per row.
+    Returns the number of text chunks and table rows stored.
+    """
+    rows = []
+    pages = separate_tables(iter_page_texts(source), rows, budget)
+    chunks = iter_chunks(pages, chunk_size=chunk_size, overlap=overlap, budget=budget)
+    stored = upsert_chunks(chunks, doc_id, index)
+    try:
+        table_rows = upsert_table_rows(rows, doc_id, index)
+    except Exception:
+        delete_vectors(index, [f"{doc_id}_chunk_{i}" for i in range(stored)])
+        raise
+    return {"chunks": stored, "table_rows": table_rows}
 
 def process_document(pdf_path: str, doc_id: str):
     """Full pipeline: extract → chunk → embed → store"""
@@ -9,24 +34,15 @@ def process_document(pdf_path: str, doc_id: str):
     print(f"Processing: {pdf_path}")
     print(f"{'='*60}\n")
     
-    # Step 1: Extract text
-    print("Step 1: Extracting text...")
-    text = extract_text_from_pdf(pdf_path)
-    print(f"Extracted {len(text)} characters")
-    
-    # Step 2: Chunk text
-    print("\nStep 2: Chunking text...")
-    # Optimized chunking: larger chunks keep related info together
-    chunks = chunk_text(text, chunk_size=2000, overlap=400)
-    print(f"Created {len(chunks)} chunks")
-    
-    # Step 3: Initialize Pinecone
-    print("\nStep 3: Connecting to Pinecone...")
+    # Step 1: Initialize Pinecone
+    print("Step 1: Connecting to Pinecone...")
     index = initialize_index()
     
-    # Step 4: Embed and store
-    print("\nStep 4: Creating embeddings and storing...")
-    upsert_chunks(chunks, doc_id, index)
+    # Step 2: Extract, chunk, embed and store, a page at a time
+    print("\nStep 2: Extracting, chunking, embedding and storing...")
+    # Optimized chunking: larger chunks keep related info together
+    stored = index_pdf(pdf_path, doc_id, index, chunk_size=2000, overlap=400)
+    print(f"Created {stored['chunks']} chunks and {stored['table_rows']} table rows")
     
     print(f"\n{'='*60}")
     print(f"COMPLETE: {doc_id} indexed successfully")
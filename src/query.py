@@ -1,13 +1,10 @@
-import os
 from dotenv import load_dotenv
-from vector_store import get_embedding, pc, INDEX_NAME
-from groq import Groq
+from vector_store import get_embedding, get_index
+from llm_client import complete
 
 load_dotenv()
 
-# Initialize Groq for answer generation (free and fast)
-client = Groq(api_key=os.getenv("XAI_API_KEY"))
-index = pc.Index(INDEX_NAME)
+index = get_index()
 
 def search(query: str, top_k: int = 5):
     """Search vector database for relevant chunks"""
@@ -48,14 +45,8 @@ def generate_answer(query: str, context_chunks: list) -> str:
         }
     ]
     
-    # Generate answer
-    response = client.chat.completions.create(
-    model="llama-3.1-8b-instant",  # Smaller, more efficient model
-    messages=messages,
-    temperature=0.3
-)
-    
-    return response.choices[0].message.content
+    # Generate answer (Groq via the shared client)
+    return complete(messages, model="llama-3.1-8b-instant", temperature=0.3)
 
 def ask(query: str):
     """Full RAG pipeline: search + generate"""
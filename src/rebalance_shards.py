@@ -0,0 +1,73 @@
+"""Move vectors to the shard their doc_id hashes to, after changing VECTOR_SHARDS
+
+Shards are placed by jump consistent hash, so adding a shard only moves
+the documents that now belong on it (about 1/N of them). Going from 1 to N
+shards moves everything out of the default namespace.
+
+Adding a shard without a gap in answers:
+    python src/rebalance_shards.py --shards 5 --keep-source   # copy; old copies still served
+    # restart the API with VECTOR_SHARDS=5
+    python src/rebalance_shards.py --shards 5                 # copy stragglers, delete old copies
+"""
+import argparse
+from typing import Dict
+from vector_store import pc, INDEX_NAME
+from shards import shard_namespace, VECTOR_SHARDS
+
+def rebalance(index, shards: int, keep_source: bool = False, dry_run: bool = False) -> Dict[str, int]:
+    """Copy every misplaced vector to its shard's namespace, then delete the original
+
+    Copy-before-delete, so an interrupted run loses nothing; run it again to
+    finish. Returns the number of vectors moved into each namespace.
+    """
+    moved = {}
+    namespaces = list(index.describe_index_stats()["namespaces"])
+
+    for namespace in namespaces:
+        for ids in index.list(namespace=namespace):
+            fetched = index.fetch(ids=ids, namespace=namespace).vectors
+
+            by_target = {}
+            for vector in fetched.values():
+                target = shard_namespace(vector.metadata["doc_id"], shards)
+                if target != namespace:
+                    by_target.setdefault(target, []).append(vector)
+
+            for target, vectors in by_target.items():
+                if not dry_run:
+                    index.upsert(
+                        vectors=[
+                            {"id": v.id, "values": list(v.values), "metadata": dict(v.metadata)}
+                            for v in vectors
+                        ],
+                        namespace=target
+                    )
+                    if not keep_source:
+                        index.delete(ids=[v.id for v in vectors], namespace=namespace)
+                moved[target] = moved.get(target, 0) + len(vectors)
+
+        print(f"Scanned namespace '{namespace}'")
+
+    return moved
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--shards", type=int, default=VECTOR_SHARDS, help="target shard count (default: VECTOR_SHARDS)")
+    parser.add_argument("--keep-source", action="store_true", help="copy only; leave the old copies in place")
+    parser.add_argument("--dry-run", action="store_true", help="report what would move")
+    args = parser.parse_args(argv)
+
+    index = pc.Index(INDEX_NAME)
+    moved = rebalance(index, args.shards, keep_source=args.keep_source, dry_run=args.dry_run)
+
+    verb = "Would move" if args.dry_run else ("Copied" if args.keep_source else "Moved")
+    for namespace, count in sorted(moved.items()):
+        print(f"{verb} {count} vectors to '{namespace or '(default)'}'")
+    print(f"{verb} {sum(moved.values())} vectors in total")
+
+    stats = index.describe_index_stats()
+    for namespace, summary in sorted(stats["namespaces"].items()):
+        print(f"  {namespace or '(default)'}: {summary['vector_count']} vectors")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+import os
+import time
+import heapq
+import signal
+import atexit
+import shutil
+import hashlib
+import tempfile
+import itertools
+import threading
+import contextlib
+import multiprocessing
+from collections import namedtuple
+from multiprocessing.connection import Listener, Client
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import List, Dict
+from pinecone import Pinecone
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Number of shards (Pinecone namespaces "shard-0".."shard-N-1"), each served by its own process.
+# 1 = unsharded: the default namespace, called in-process as before
+VECTOR_SHARDS = int(os.getenv("VECTOR_SHARDS", "1"))
+SHARD_CONCURRENCY = int(os.getenv("SHARD_CONCURRENCY", "8"))  # calls in flight per shard process
+SHARD_TIMEOUT = float(os.getenv("SHARD_TIMEOUT", "30"))       # seconds to wait for one shard
+
+Match = namedtuple("Match", "id score metadata")
+QueryResult = namedtuple("QueryResult", "matches")
+
+class ShardError(Exception):
+    """A shard process failed a call or went away"""
+
+# ===== PLACEMENT =====
+def jump_hash(key: int, buckets: int) -> int:
+    """Jump consistent hash (Lamping & Veach): going from N to N+1 buckets moves only 1/(N+1) of keys"""
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+def shard_of(doc_id: str, shards: int) -> int:
+    """Shard number of a document (stable across processes, unlike hash())"""
+    key = int.from_bytes(hashlib.blake2b(doc_id.encode(), digest_size=8).digest(), "big")
+    return jump_hash(key, shards)
+
+def shard_namespace(doc_id: str, shards: int) -> str:
+    """Namespace a document's vectors belong in with `shards` shards"""
+    return "" if shards <= 1 else f"shard-{shard_of(doc_id, shards)}"
+
+# ===== SHARD PROCESS =====
+def _query(index, namespace: str, **kwargs) -> List[tuple]:
+    results = index.query(namespace=namespace, **kwargs)
+    return [(m.id, m.score, dict(m.metadata or {})) for m in results.matches]
+
+def _upsert(index, namespace: str, vectors: List[dict]) -> int:
+    index.upsert(vectors=vectors, namespace=namespace)
+    return len(vectors)
+
+def _delete(index, namespace: str, ids: List[str]):
+    index.delete(ids=ids, namespace=namespace)
+
+def _count(index, namespace: str) -> int:
+    summary = index.describe_index_stats()["namespaces"].get(namespace)
+    return summary["vector_count"] if summary else 0
+
+_OPS = {"query": _query, "upsert": _upsert, "delete": _delete, "count": _count}
+
+def _serve_client(conn, index, namespace: str, pool: ThreadPoolExecutor):
+    """Read one API process's calls off its connection; replies go back on it as they finish"""
+    send_lock = threading.Lock()
+
+    def handle(request_id: int, op: str, kwargs: dict):
+        try:
+            reply = (request_id, _OPS[op](index, namespace, **kwargs), None)
+        except Exception as e:
+            reply = (request_id, None, f"{type(e).__name__}: {e}")
+        with send_lock:
+            try:
+                conn.send(reply)
+            except OSError:
+                pass  # that process went away
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        pool.submit(handle, *message)
+    conn.close()
+
+def _watch_parent(parent_pid: int, address: str):
+    # Daemon children of a parent that leaves with os._exit are not reaped
+    while os.getppid() == parent_pid:
+        time.sleep(1.0)
+    with contextlib.suppress(OSError):
+        os.unlink(address)
+    os._exit(0)
+
+def _serve_shard(address: str, ready, parent_pid: int, index_name: str, namespace: str, concurrency: int):
+    """Shard process: run index calls for one namespace, for every API process that connects"""
+    # A restart is forked from api/server.py's parent after it installed its shutdown handlers;
+    # Ctrl-C is for the parent, which stops the shards on its way out
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Own client and connection pool; nothing shared with the parent's
+    index = Pinecone(api_key=os.getenv("PINECONE_API_KEY")).Index(index_name)
+    # A shard that died without closing its listener leaves the socket file behind
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(address)
+    listener = Listener(address, family="AF_UNIX")
+    ready.send(True)
+    ready.close()
+
+    threading.Thread(target=_watch_parent, args=(parent_pid, address), daemon=True).start()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=namespace) as pool:
+        while True:
+            conn = listener.accept()
+            threading.Thread(target=_serve_client, args=(conn, index, namespace, pool), daemon=True).start()
+
+class _Shard:
+    """Handle of one shard process: started once, then connected to by each process that uses it
+
+    Threads of a process share its connection and get futures back. The
+    socket lives in a private (0700) directory, since calls are pickled.
+    """
+
+    def __init__(self, index_name: str, namespace: str, address: str):
+        self.index_name = index_name
+        self.namespace = namespace
+        self.address = address
+        self._process = None
+        self._owner = None
+        self._start_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._conn = None
+        self._pending = None
+        self._conn_pid = None
+
+    def start(self):
+        """Fork the shard process and wait until it is listening
+
+        First called while the process is single-threaded: at import, or in
+        the api/server.py parent before it forks workers (which then share it).
+        Only that owner process can start it again (see ensure_running).
+        """
+        ctx = multiprocessing.get_context("fork")
+        ready, child_ready = ctx.Pipe(duplex=False)
+        process = ctx.Process(
+            target=_serve_shard,
+            args=(self.address, child_ready, os.getpid(), self.index_name, self.namespace, SHARD_CONCURRENCY),
+            name=f"vector-{self.namespace}",
+            daemon=True
+        )
+        process.start()
+        child_ready.close()
+        try:
+            ready.recv()
+        except EOFError:
+            raise ShardError(f"{self.namespace}: shard process failed to start") from None
+        finally:
+            ready.close()
+        self._process = process
+        self._owner = os.getpid()
+
+    def ensure_running(self) -> bool:
+        """Start the shard process again if it died; True if it was restarted
+
+        Only the process that started it can: is_alive() also reaps it, so
+        multiprocessing forgets the old pid. Other processes (forked workers)
+        get ShardError until their owner restarts it.
+        """
+        if self._process is None or self._owner != os.getpid():
+            return False
+        with self._start_lock:
+            if self._process.is_alive():
+                return False
+            print(f"Vector shard {self.namespace} (pid {self._process.pid}) exited, restarting")
+            self.start()
+            return True
+
+    def _connect(self):
+        try:
+            conn = Client(self.address, family="AF_UNIX")
+        except OSError as e:
+            raise ShardError(f"{self.namespace}: shard process not reachable ({e})") from None
+        self._conn = conn
+        self._pending = {}
+        self._conn_pid = os.getpid()
+        threading.Thread(target=self._read, args=(conn, self._pending), daemon=True).start()
+
+    def _read(self, conn, pending: Dict[int, Future]):
+        while True:
+            try:
+                request_id, result, error = conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                future = pending.pop(request_id, None)
+            if future is None:
+                continue
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(ShardError(f"{self.namespace}: {error}"))
+
+        # Process gone: fail whatever was still waiting on it, reconnect on the next call
+        with self._lock:
+            lost = list(pending.values())
+            pending.clear()
+            if self._conn is conn:
+                self._conn = None
+        conn.close()
+        for future in lost:
+            future.set_exception(ShardError(f"{self.namespace}: shard process exited"))
+
+    def submit(self, op: str, **kwargs) -> Future:
+        future = Future()
+        # Second attempt: the process died before our reader noticed; restart/reconnect once
+        for attempt in range(2):
+            if self._conn is None or self._conn_pid != os.getpid():
+                self.ensure_running()
+            with self._lock:
+                # Connected once per process: a forked worker opens its own connection
+                if self._conn is None or self._conn_pid != os.getpid():
+                    self._connect()
+                request_id = next(self._ids)
+                self._pending[request_id] = future
+                try:
+                    self._conn.send((request_id, op, kwargs))
+                    return future
+                except OSError as e:
+                    self._pending.pop(request_id)
+                    self._conn = None
+                    error = e
+        raise ShardError(f"{self.namespace}: send failed ({error})")
+
+# ===== SHARDED INDEX =====
+class ShardedIndex:
+    """Index handle that spreads documents over shard processes, one Pinecone namespace each
+
+    Drop-in for the pinecone.Index calls used here: upsert routes each vector
+    to its shard by the doc_id in its metadata, query asks every shard at
+    once and heap-merges their top k, delete and stats go to every shard.
+    start() forks the shard processes; processes forked after that share them.
+    """
+
+    def __init__(self, index_name: str, shards: int = VECTOR_SHARDS):
+        self._socket_dir = tempfile.mkdtemp(prefix="vector-shards-")
+        self._owner = os.getpid()
+        self._started = False
+        self._start_lock = threading.Lock()
+        atexit.register(self._cleanup)
+        self.shards = [
+            _Shard(index_name, f"shard-{i}", os.path.join(self._socket_dir, f"shard-{i}.sock"))
+            for i in range(shards)
+        ]
+
+    def _cleanup(self):
+        # Forked workers leave with os._exit and never get here; only the owner removes the sockets
+        if os.getpid() == self._owner:
+            shutil.rmtree(self._socket_dir, ignore_errors=True)
+
+    def start(self) -> "ShardedIndex":
+        """Start the shard processes once; later calls (and forked workers) just return the index"""
+        with self._start_lock:
+            if not self._started:
+                if os.getpid() != self._owner:
+                    raise ShardError("shards must be started before forking, in the process that created them")
+                for shard in self.shards:
+                    shard.start()
+                self._started = True
+        return self
+
+    def restart_dead(self) -> List[str]:
+        """Start any dead shard process again (in the process that started them); their namespaces"""
+        return [shard.namespace for shard in self.shards if shard.ensure_running()]
+
+    def _gather(self, futures: List[Future]) -> list:
+        done, pending = wait(futures, timeout=SHARD_TIMEOUT)
+        if pending:
+            raise ShardError(f"{len(pending)} shard(s) did not answer within {SHARD_TIMEOUT:.0f}s")
+        return [f.result() for f in futures]
+
+    def upsert(self, vectors: List[dict], **kwargs) -> dict:
+        groups = {}
+        for vector in vectors:
+            groups.setdefault(shard_of(vector["metadata"]["doc_id"], len(self.shards)), []).append(vector)
+        futures = [self.shards[i].submit("upsert", vectors=group) for i, group in groups.items()]
+        return {"upserted_count": sum(self._gather(futures))}
+
+    def query(self, vector: List[float], top_k: int = 10, include_metadata: bool = False,
+              filter: dict = None, **kwargs) -> QueryResult:
+        request = {"vector": vector, "top_k": top_k, "include_metadata": include_metadata}
+        if filter:
+            request["filter"] = filter
+        per_shard = self._gather([shard.submit("query", **request) for shard in self.shards])
+
+        # Each shard's matches are sorted; k-way heap merge, stop at top_k.
+        # Mid-rebalance a vector can be in two shards: keep its first (equal) score only
+        matches = []
+        seen = set()
+        for id, score, metadata in heapq.merge(*per_shard, key=lambda m: m[1], reverse=True):
+            if id in seen:
+                continue
+            seen.add(id)
+            matches.append(Match(id, score, metadata))
+            if len(matches) == top_k:
+                break
+        return QueryResult(matches)
+
+    def delete(self, ids: List[str], **kwargs) -> dict:
+        # Ids don't say which shard holds them; deleting a missing id is a no-op
+        self._gather([shard.submit("delete", ids=ids) for shard in self.shards])
+        return {}
+
+    def describe_index_stats(self, **kwargs) -> dict:
+        counts = self._gather([shard.submit("count") for shard in self.shards])
+        return {
+            "total_vector_count": sum(counts),
+            "namespaces": {
+                shard.namespace: {"vector_count": count} for shard, count in zip(self.shards, counts)
+            }
+        }
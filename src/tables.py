@@ -0,0 +1,175 @@
+import re
+from typing import List, Dict, Optional, Tuple
+
+# A figure as PyPDF2 renders it: 96,773 | $ 1,234.5 | (1,234) | 12.5% | — (zero)
+_NUMBER = re.compile(r"^\(?-?\$?\d[\d,]*(?:\.\d+)?\)?%?$|^[—–-]$")
+_YEAR = re.compile(r"^(?:19|20)\d{2}$")
+_LETTERS = re.compile(r"[A-Za-z]")
+# One date per column, as balance sheets head them: "December 31, 2023 December 31, 2022"
+_DATE = re.compile(
+    r"\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.? +\d{1,2}, *((?:19|20)\d{2})\b"
+)
+# Page furniture: "45", "- 45 -", "Page 45", "Page 45 of 120"
+_PAGE_NUMBER = re.compile(r"^(?:page +)?[-–— ]*\d{1,4}[-–— ]*(?:of +\d+)?$", re.IGNORECASE)
+_DIGITS = re.compile(r"\d+")
+
+MIN_ROWS = 2           # fewer than this is prose that happens to end in numbers
+MAX_HEADING_CHARS = 80
+
+def _split_values(line: str) -> Tuple[str, List[str]]:
+    """Split a line into its label and the run of figures at its end"""
+    tokens = line.split()
+    values = []
+    while tokens and (_NUMBER.match(tokens[-1]) or tokens[-1] == "$"):
+        token = tokens.pop()
+        if token != "$":
+            values.append(token)
+    return " ".join(tokens).rstrip(" $:"), values[::-1]
+
+def _header_columns(line: str) -> Optional[List[str]]:
+    """Column names if the line is a year header ("Year Ended December 31, 2023 2022 2021",
+    "December 31, 2023 December 31, 2022")"""
+    years = []
+    for token in reversed(_DATE.sub(r"\1", line).split()):
+        token = token.strip(",")
+        if not _YEAR.match(token):
+            break
+        years.append(token)
+    return years[::-1] if len(years) >= 2 else None
+
+def _row(line: str) -> Optional[Tuple[str, List[str]]]:
+    """(label, values) if the line is a table row; year headers are not rows"""
+    label, values = _split_values(line)
+    if len(values) < 2 or not _LETTERS.search(label) or _header_columns(line):
+        return None
+    return label, values
+
+def _is_heading(line: str) -> bool:
+    """Short label-only line, e.g. a section name inside a table ("Revenues")"""
+    text = line.strip()
+    return 0 < len(text) <= MAX_HEADING_CHARS and not text.endswith(".") and _LETTERS.search(text) is not None
+
+def _edge_key(line: str) -> str:
+    """A running header/footer line with its page numbers blanked, to compare across pages"""
+    return _DIGITS.sub("#", line.strip().lower())
+
+def _page_body(lines: List[str], running: set) -> Tuple[int, int]:
+    """Line range between the page furniture: blank lines, page numbers and, at the top
+    and bottom, lines the previous page also had there (running header/footer)"""
+    def furniture(line: str) -> bool:
+        text = line.strip()
+        return not text or _PAGE_NUMBER.match(text) is not None or _edge_key(text) in running
+
+    start, end = 0, len(lines)
+    while start < end and furniture(lines[start]):
+        start += 1
+    while end > start and furniture(lines[end - 1]):
+        end -= 1
+    return start, end
+
+def split_tables(page_text: str, page: int = None, continued: Dict = None) -> Tuple[List[Dict], str, Dict]:
+    """Find tables in one page of extracted text
+
+    Returns the table rows as records (label, column names, values, table
+    title and section), the page text with the tables removed, and state for
+    the next page: a table still open at the bottom of this one and this
+    page's edge lines. Pass it back as `continued` for the next page so a
+    table split by a page break keeps its title and column headers, even
+    with a page number or running header/footer in between.
+    """
+    lines = page_text.split("\n")
+    rows = []
+    table_lines = set()
+    carry = None
+    open_table = continued["table"] if continued else None
+    body_start, body_end = _page_body(lines, continued["edges"] if continued else set())
+
+    i = 0
+    while i < len(lines):
+        if _row(lines[i]) is None and _header_columns(lines[i]) is None:
+            i += 1
+            continue
+
+        # Grow the block over rows, headers, and headings followed by a row
+        start = i
+        end = i
+        j = i
+        while j < len(lines):
+            if _row(lines[j]) or _header_columns(lines[j]):
+                end = j
+            elif not (_is_heading(lines[j]) and j + 1 < len(lines) and _row(lines[j + 1])):
+                break
+            j += 1
+        block = range(start, end + 1)
+        i = end + 1
+
+        # Title: up to two heading lines just above ("Statements of Operations", "(in millions)")
+        title_start = start
+        while title_start > body_start and start - title_start < 2 and _is_heading(lines[title_start - 1]) \
+                and not _row(lines[title_start - 1]):
+            title_start -= 1
+        title = " ".join(lines[k].strip() for k in range(title_start, start))
+        at_page_end = not any(line.strip() for line in lines[end + 1:body_end])
+
+        row_count = sum(1 for k in block if _row(lines[k]))
+        if row_count == 0 and at_page_end:
+            # Title and header at the foot of the page, rows on the next one
+            table_lines.update(range(title_start, end + 1))
+            carry = {"title": title, "section": "", "columns": _header_columns(lines[end])}
+            continue
+        # Headerless block at the top of the page: the rest of the previous page's table
+        continues = open_table and not any(lines[k].strip() for k in range(body_start, title_start)) \
+            and not any(_header_columns(lines[k]) for k in block)
+        if row_count < MIN_ROWS and not continues:
+            continue
+
+        columns = None
+        section = ""
+        if continues:
+            columns = open_table["columns"]
+            section = title or open_table["section"]
+            title = open_table["title"]
+
+        table_lines.update(range(title_start, end + 1))
+        for k in block:
+            header = _header_columns(lines[k])
+            parsed = _row(lines[k])
+            if header:
+                columns = header
+            elif parsed:
+                label, values = parsed
+                names = columns if columns and len(columns) == len(values) else [
+                    f"col{n + 1}" for n in range(len(values))
+                ]
+                rows.append({
+                    "page": page,
+                    "title": title,
+                    "section": section,
+                    "label": label,
+                    "columns": names,
+                    "values": values
+                })
+                if label.lower().startswith("total"):
+                    section = ""
+            else:
+                section = lines[k].strip()
+
+        if at_page_end:
+            carry = {"title": title, "section": section, "columns": columns}
+
+    remaining = "\n".join(line for k, line in enumerate(lines) if k not in table_lines)
+    # Top and bottom line, unless table content: candidates for the next page's running header/footer
+    text_lines = [line for line in lines if line.strip()]
+    edges = {
+        _edge_key(line) for line in text_lines[:1] + text_lines[-1:]
+        if not (_row(line) or _header_columns(line) or _PAGE_NUMBER.match(line.strip()))
+    }
+    return rows, remaining, {"table": carry, "edges": edges}
+
+def row_text(row: Dict) -> str:
+    """Compact text for embedding and prompts: where the row is from, then column = value"""
+    context = " / ".join(part for part in (row["title"], row["section"]) if part)
+    cells = "; ".join(f"{c} = {v}" for c, v in zip(row["columns"], row["values"]))
+    prefix = f"{context} / " if context else ""
+    page = f" (page {row['page']})" if row.get("page") is not None else ""
+    return f"{prefix}{row['label']}: {cells}{page}"
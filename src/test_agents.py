@@ -13,6 +13,10 @@ def ask_agent(query: str):
         query=query,
         retrieved_chunks=[],
         retrieval_score=0.0,
+        figures=[],
+        context="",
+        context_tokens=0,
+        tokens_saved=0,
         answer="",
         answer_confidence=0.0,
         has_hallucination=False,
@@ -36,6 +40,7 @@ def ask_agent(query: str):
     print(f"Steps taken: {result['step_count']}")
     print(f"Retrieval score: {result.get('retrieval_score', 0):.4f}")
     print(f"Answer confidence: {result.get('answer_confidence', 0):.4f}")
+    print(f"Context tokens: {result.get('context_tokens', 0)} ({result.get('tokens_saved', 0)} saved)")
     print(f"Hallucination check: {'PASS' if not result.get('has_hallucination') else 'FAIL'}")
     print(f"\n{'='*70}\n")
 
@@ -1,8 +1,13 @@
 import os
+import threading
+from collections import OrderedDict
+import numpy as np
 from pinecone import Pinecone, ServerlessSpec
 from dotenv import load_dotenv
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator
 from sentence_transformers import SentenceTransformer
+from tables import row_text
+from shards import ShardedIndex, VECTOR_SHARDS
 
 load_dotenv()
 
@@ -15,6 +20,19 @@ pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
 
 INDEX_NAME = "doc-intelligence"
 
+# Recently embedded texts (queries, context sentences); ~1.5KB per entry
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+_embedding_cache = OrderedDict()
+_embedding_cache_lock = threading.Lock()
+
+# Shard processes start on the first get_index(): in api/server.py's parent before it forks
+# the workers (which all connect to the same shards), otherwise at import of agents.nodes
+_sharded_index = ShardedIndex(INDEX_NAME, VECTOR_SHARDS) if VECTOR_SHARDS > 1 else None
+
+def get_index():
+    """Index handle for reads and writes: sharded across processes when VECTOR_SHARDS > 1"""
+    return _sharded_index.start() if _sharded_index is not None else pc.Index(INDEX_NAME)
+
 def initialize_index():
     """Create Pinecone index if it doesn't exist"""
     existing_indexes = [index.name for index in pc.list_indexes()]
@@ -33,48 +51,140 @@ def initialize_index():
     else:
         print(f"Index already exists: {INDEX_NAME}")
     
-    return pc.Index(INDEX_NAME)
+    return get_index()
 
 def get_embedding(text: str) -> List[float]:
     """Get embedding from local model"""
     embedding = embedding_model.encode(text, convert_to_tensor=False)
     return embedding.tolist()
 
-def upsert_chunks(chunks: List[Dict], doc_id: str, index):
-    """Store chunks in Pinecone with embeddings"""
-    vectors = []
-    
-    print(f"Creating embeddings for {len(chunks)} chunks...")
+def get_embeddings(texts: List[str]) -> List[List[float]]:
+    """Embed many texts in one batched pass (much faster than one call per text)"""
+    if not texts:
+        return []
+    embeddings = embedding_model.encode(texts, convert_to_tensor=False, batch_size=64)
+    return embeddings.tolist()
+
+def get_cached_embeddings(texts: List[str]) -> np.ndarray:
+    """Embed texts as one matrix, re-using recent results; only unseen texts hit the model"""
+    rows = [None] * len(texts)
+    missing = {}
+    with _embedding_cache_lock:
+        for i, text in enumerate(texts):
+            if text in _embedding_cache:
+                _embedding_cache.move_to_end(text)
+                rows[i] = _embedding_cache[text]
+            else:
+                missing.setdefault(text, []).append(i)
+
+    if missing:
+        new = np.asarray(embedding_model.encode(list(missing), convert_to_tensor=False, batch_size=64), dtype=np.float32)
+        with _embedding_cache_lock:
+            for (text, positions), vector in zip(missing.items(), new):
+                for i in positions:
+                    rows[i] = vector
+                _embedding_cache[text] = vector
+                if len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+                    _embedding_cache.popitem(last=False)
+
+    if not rows:
+        return np.zeros((0, embedding_model.get_sentence_embedding_dimension()), dtype=np.float32)
+    return np.vstack(rows)
+
+def upsert_chunks(chunks: Iterable[Dict], doc_id: str, index, batch_size: int = 100) -> int:
+    """Store chunks in Pinecone with embeddings, one batch at a time; returns vectors stored
+
+    Accepts any iterable, so a chunk generator is embedded and uploaded
+    without the whole document's chunks or vectors ever being in memory.
+    """
+    print(f"Creating embeddings and uploading in batches of {batch_size}...")
     
-    for i, chunk in enumerate(chunks):
-        # Get embedding
-        embedding = get_embedding(chunk["text"])
-        
-        # Prepare vector
-        vectors.append({
-            "id": f"{doc_id}_chunk_{i}",
-            "values": embedding,
-            "metadata": {
-                "text": chunk["text"],
-                "doc_id": doc_id,
-                "chunk_id": i,
-                "char_start": chunk["char_start"],
-                "char_end": chunk["char_end"]
-            }
-        })
-        
-        # Show progress
-        if (i + 1) % 50 == 0:
-            print(f"  Processed {i + 1}/{len(chunks)} chunks...")
+    stored = 0
+    try:
+        for number, batch in enumerate(_batches(chunks, batch_size), start=1):
+            # One encode() call per batch instead of one per chunk
+            embeddings = get_embeddings([chunk["text"] for chunk in batch])
+            
+            vectors = [
+                {
+                    "id": f"{doc_id}_chunk_{stored + i}",
+                    "values": embedding,
+                    "metadata": {
+                        "type": "text",
+                        "text": chunk["text"],
+                        "doc_id": doc_id,
+                        "chunk_id": stored + i,
+                        "char_start": chunk["char_start"],
+                        "char_end": chunk["char_end"]
+                    }
+                }
+                for i, (chunk, embedding) in enumerate(zip(batch, embeddings))
+            ]
+            index.upsert(vectors=vectors)
+            stored += len(vectors)
+            print(f"Uploaded batch {number} ({stored} chunks)")
+    except Exception:
+        # Don't leave a half-indexed document behind
+        delete_vectors(index, [f"{doc_id}_chunk_{i}" for i in range(stored)])
+        raise
     
-    # Upsert to Pinecone in batches
-    batch_size = 100
-    for i in range(0, len(vectors), batch_size):
-        batch = vectors[i:i + batch_size]
-        index.upsert(vectors=batch)
-        print(f"Uploaded batch {i//batch_size + 1}")
+    print(f"Stored {stored} vectors for {doc_id}")
+    return stored
+
+def upsert_table_rows(rows: Iterable[Dict], doc_id: str, index, batch_size: int = 100) -> int:
+    """Store table rows as their own small vectors (metadata type "table_row"); returns rows stored
+
+    Each row is embedded with its table title and column headers, and keeps
+    its label, columns and values in metadata for exact figure lookups.
+    """
+    stored = 0
+    try:
+        for batch in _batches(rows, batch_size):
+            texts = [row_text(row) for row in batch]
+            embeddings = get_embeddings(texts)
+            
+            vectors = [
+                {
+                    "id": f"{doc_id}_row_{stored + i}",
+                    "values": embedding,
+                    "metadata": {
+                        "text": text,
+                        "doc_id": doc_id,
+                        "chunk_id": stored + i,
+                        "type": "table_row",
+                        "page": row["page"],
+                        "title": row["title"],
+                        "section": row["section"],
+                        "label": row["label"],
+                        "columns": row["columns"],
+                        "values": row["values"]
+                    }
+                }
+                for i, (row, text, embedding) in enumerate(zip(batch, texts, embeddings))
+            ]
+            index.upsert(vectors=vectors)
+            stored += len(vectors)
+    except Exception:
+        delete_vectors(index, [f"{doc_id}_row_{i}" for i in range(stored)])
+        raise
     
-    print(f"Stored {len(vectors)} vectors for {doc_id}")
+    print(f"Stored {stored} table rows for {doc_id}")
+    return stored
+
+def delete_vectors(index, ids: List[str]):
+    """Delete vectors by id, in requests of at most 1000 ids"""
+    for i in range(0, len(ids), 1000):
+        index.delete(ids=ids[i:i + 1000])
+
+def _batches(items: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 if __name__ == "__main__":
     # Test connection